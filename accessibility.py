@@ -0,0 +1,132 @@
+import math
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+
+from amenity_grid import grid_bounds
+from geo import distances_km, haversine_km
+from poi_store import VersionCache
+from spatial_index import SPHERE_MARGIN, chord_to_km, get_category_indexes, km_to_chord, to_unit_xyz
+
+# 🔹 ملف الوصول: أقرب مكان من كل تصنيف (حتى لو خارج النطاق) باستعلام واحد
+NEAREST_CELL_KM = 1.0
+
+# 🔹 مرشحين إضافيين لكل تصنيف لأن ترتيب المسافة على الكرة قد يختلف قليلًا عن الإهليلج
+NEAREST_CANDIDATES = 5
+
+
+@dataclass(frozen=True)
+class NearestGrid:
+    lat0: float
+    lon0: float
+    dlat: float
+    dlon: float
+    categories: list
+    nearest_km: np.ndarray  # (ny, nx, التصنيفات) المسافة من مركز الخلية لأقرب مكان
+
+    def cell_of(self, location):
+        row = int(math.floor((location[0] - self.lat0) / self.dlat))
+        col = int(math.floor((location[1] - self.lon0) / self.dlon))
+        if 0 <= row < self.nearest_km.shape[0] and 0 <= col < self.nearest_km.shape[1]:
+            return row, col
+        return None
+
+    def cell_center(self, row, col):
+        return (self.lat0 + (row + 0.5) * self.dlat, self.lon0 + (col + 0.5) * self.dlon)
+
+
+def build_nearest_grid(store, cell_km=NEAREST_CELL_KM):
+    lat0, lon0, dlat, dlon, ny, nx = grid_bounds(store, cell_km)
+    rows, cols = np.meshgrid(np.arange(ny), np.arange(nx), indexing="ij")
+    xyz = to_unit_xyz(lat0 + (rows.ravel() + 0.5) * dlat, lon0 + (cols.ravel() + 0.5) * dlon)
+
+    indexes = get_category_indexes(store)
+    nearest = np.full((ny * nx, len(store.categories)), np.inf, dtype="float32")
+    for c, category in enumerate(store.categories):
+        if len(indexes[category]):
+            chord, _ = indexes[category].tree.query(xyz, k=1)
+            nearest[:, c] = chord_to_km(chord)
+    return NearestGrid(lat0, lon0, dlat, dlon, store.categories, nearest.reshape(ny, nx, -1))
+
+
+_grids = VersionCache()
+
+
+def get_nearest_grid(store):
+    return _grids.get(store.version, partial(build_nearest_grid, store))
+
+
+def coarse_nearest(store, location):
+    # 🔹 تقدير فوري بدون بحث: |d(الموقع) - d(مركز الخلية)| ≤ المسافة بين الموقع والمركز
+    grid = get_nearest_grid(store)
+    cell = grid.cell_of(location)
+    if cell is None:
+        return None
+    center = grid.cell_center(*cell)
+    offset = float(haversine_km(center[0], center[1], [location[0]], [location[1]])[0])
+    nearest = grid.nearest_km[cell].astype("float64")
+    return {
+        category: (max(0.0, nearest[c] - offset), nearest[c] + offset)
+        for c, category in enumerate(grid.categories)
+    }
+
+
+@dataclass(frozen=True)
+class NearestPoi:
+    category: str
+    position: int  # -1 إذا التصنيف فاضي
+    distance_km: float
+
+
+def accessibility_profile(store, location, categories=None):
+    # 🔹 الحد الأعلى من الشبكة يقصّ البحث في كل شجرة، ثم حساب المسافة الدقيقة لكل المرشحين دفعة وحدة
+    location = (float(location[0]), float(location[1]))
+    categories = store.categories if categories is None else categories
+    bounds = coarse_nearest(store, location) or {}
+    indexes = get_category_indexes(store)
+    point = to_unit_xyz([location[0]], [location[1]])[0]
+
+    groups, candidates = [], []
+    for category in categories:
+        index = indexes.get(category)
+        if index is None or not len(index):
+            continue
+        upper = bounds.get(category, (0.0, np.inf))[1] * SPHERE_MARGIN
+        chord, found = index.tree.query(
+            point, k=min(NEAREST_CANDIDATES, len(index)), distance_upper_bound=km_to_chord(upper) if np.isfinite(upper) else np.inf
+        )
+        found = np.atleast_1d(found)[np.isfinite(np.atleast_1d(chord))]
+        if not len(found):
+            # 🔹 احتياط نادر (حافة الخلية): بحث بدون حد
+            _, found = index.tree.query(point, k=min(NEAREST_CANDIDATES, len(index)))
+            found = np.atleast_1d(found)
+        groups.append((category, len(found)))
+        candidates.append(index.positions[found])
+
+    profile = {category: NearestPoi(category, -1, math.inf) for category in categories}
+    if not candidates:
+        return profile
+
+    positions = np.concatenate(candidates)
+    distances = distances_km(location, store.lat[positions], store.lon[positions])
+    start = 0
+    for category, size in groups:
+        best = start + int(np.argmin(distances[start:start + size]))
+        profile[category] = NearestPoi(category, int(positions[best]), float(distances[best]))
+        start += size
+    return profile
+
+
+def profile_summary(store, profile):
+    # 🔹 قابل للتحويل إلى JSON (تستخدمه الواجهة البرمجية)
+    names = store.frame["Name"]
+    return {
+        category: None if nearest.position < 0 else {
+            "name": str(names.iloc[nearest.position]),
+            "lat": float(store.lat[nearest.position]),
+            "lon": float(store.lon[nearest.position]),
+            "distance_km": round(nearest.distance_km, 3),
+        }
+        for category, nearest in profile.items()
+    }
@@ -0,0 +1,223 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from categories import category_translation
+from geo import EARTH_RADIUS_KM
+from poi_store import CACHE_DIR, get_store
+from spatial_index import chord_to_km, get_category_indexes, km_to_chord, to_unit_xyz
+
+# 🔹 شبكة محسوبة مسبقًا فوق الرياض: لكل خلية عدد الخدمات لكل نطاق من نطاقات الشريط وأقرب مسافة
+GRID_DIR = os.path.join(CACHE_DIR, "amenity_grid")
+RADII_KM = np.arange(1.0, 15.5, 0.5)
+CELL_KM = 0.5
+
+# 🔹 نستبعد النقاط الشاذة خارج المدينة عند تحديد حدود الشبكة
+BOUNDS_QUANTILE = 0.005
+
+
+@dataclass(frozen=True)
+class AmenityGrid:
+    lat0: float
+    lon0: float
+    dlat: float
+    dlon: float
+    categories: list
+    radii_km: np.ndarray
+    counts: np.ndarray  # (ny, nx, التصنيفات, النطاقات)
+    nearest_km: np.ndarray  # (ny, nx, التصنيفات)
+    digest: str
+
+    @property
+    def shape(self):
+        return self.counts.shape[:2]
+
+    def cell_center(self, row, col):
+        return (self.lat0 + (row + 0.5) * self.dlat, self.lon0 + (col + 0.5) * self.dlon)
+
+    def cell_of(self, location):
+        row = int(math.floor((location[0] - self.lat0) / self.dlat))
+        col = int(math.floor((location[1] - self.lon0) / self.dlon))
+        if 0 <= row < self.shape[0] and 0 <= col < self.shape[1]:
+            return row, col
+        return None
+
+    def radius_index(self, radius_km):
+        return int(np.clip(np.searchsorted(self.radii_km, radius_km - 1e-9), 0, len(self.radii_km) - 1))
+
+
+def city_bounds(store):
+    # 🔹 (جنوب، غرب، شمال، شرق) بعد استبعاد الأطراف الشاذة، مشتركة بين الشبكات وخرائط الكثافة
+    lat_lo, lat_hi = np.quantile(store.lat, [BOUNDS_QUANTILE, 1 - BOUNDS_QUANTILE])
+    lon_lo, lon_hi = np.quantile(store.lon, [BOUNDS_QUANTILE, 1 - BOUNDS_QUANTILE])
+    return float(lat_lo), float(lon_lo), float(lat_hi), float(lon_hi)
+
+
+def grid_bounds(store, cell_km=CELL_KM):
+    lat_lo, lon_lo, lat_hi, lon_hi = city_bounds(store)
+
+    dlat = math.degrees(cell_km / EARTH_RADIUS_KM)
+    dlon = dlat / math.cos(math.radians((lat_lo + lat_hi) / 2))
+    ny = int(math.ceil((lat_hi - lat_lo) / dlat))
+    nx = int(math.ceil((lon_hi - lon_lo) / dlon))
+    return lat_lo, lon_lo, dlat, dlon, ny, nx
+
+
+# 🔹 كل عملية فرعية تبني الفهارس مرة واحدة (أو ترثها عند fork)
+_worker_indexes = None
+
+
+def _init_worker():
+    global _worker_indexes
+    _worker_indexes = get_category_indexes(get_store())
+
+
+def _count_chunk(args):
+    lats, lons, categories = args
+    xyz = to_unit_xyz(lats, lons)
+    chords = km_to_chord(RADII_KM)
+
+    counts = np.zeros((len(lats), len(categories), len(RADII_KM)), dtype="uint16")
+    nearest = np.full((len(lats), len(categories)), np.inf, dtype="float32")
+    for c, category in enumerate(categories):
+        index = _worker_indexes[category]
+        for r, chord in enumerate(chords):
+            counts[:, c, r] = index.tree.query_ball_point(xyz, chord, return_length=True)
+
+        chord, _ = index.tree.query(xyz, k=1)
+        nearest[:, c] = chord_to_km(chord)
+    return counts, nearest
+
+
+def build_grid(store, cell_km=CELL_KM, workers=None, chunk_cells=512, progress=None):
+    lat0, lon0, dlat, dlon, ny, nx = grid_bounds(store, cell_km)
+    rows, cols = np.meshgrid(np.arange(ny), np.arange(nx), indexing="ij")
+    lats = (lat0 + (rows.ravel() + 0.5) * dlat)
+    lons = (lon0 + (cols.ravel() + 0.5) * dlon)
+    categories = store.categories
+
+    chunks = [
+        (lats[i:i + chunk_cells], lons[i:i + chunk_cells], categories)
+        for i in range(0, len(lats), chunk_cells)
+    ]
+
+    counts = []
+    nearest = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for done, (chunk_counts, chunk_nearest) in enumerate(pool.map(_count_chunk, chunks), start=1):
+            counts.append(chunk_counts)
+            nearest.append(chunk_nearest)
+            if progress:
+                progress(done, len(chunks))
+
+    return AmenityGrid(
+        lat0=lat0,
+        lon0=lon0,
+        dlat=dlat,
+        dlon=dlon,
+        categories=categories,
+        radii_km=RADII_KM.copy(),
+        counts=np.concatenate(counts).reshape(ny, nx, len(categories), len(RADII_KM)),
+        nearest_km=np.concatenate(nearest).reshape(ny, nx, len(categories)),
+        digest=store.digest,
+    )
+
+
+def save_grid(grid, directory=GRID_DIR):
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "counts.npy"), grid.counts)
+    np.save(os.path.join(directory, "nearest_km.npy"), grid.nearest_km)
+    meta = {
+        "lat0": grid.lat0,
+        "lon0": grid.lon0,
+        "dlat": grid.dlat,
+        "dlon": grid.dlon,
+        "categories": grid.categories,
+        "radii_km": grid.radii_km.tolist(),
+        "digest": grid.digest,
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+
+
+def load_grid(directory=GRID_DIR, digest=None):
+    # 🔹 تحميل بدون نسخ (memory-map)، ويرجع None إذا الشبكة غير موجودة أو قديمة
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if digest is not None and meta["digest"] != digest:
+        return None
+
+    return AmenityGrid(
+        lat0=meta["lat0"],
+        lon0=meta["lon0"],
+        dlat=meta["dlat"],
+        dlon=meta["dlon"],
+        categories=meta["categories"],
+        radii_km=np.asarray(meta["radii_km"]),
+        counts=np.load(os.path.join(directory, "counts.npy"), mmap_mode="r"),
+        nearest_km=np.load(os.path.join(directory, "nearest_km.npy"), mmap_mode="r"),
+        digest=meta["digest"],
+    )
+
+
+def best_cells(grid, categories, radius_km, top=10):
+    # 🔹 ترتيب الخلايا حسب توفر الخدمات المختارة (log لتقليل سيطرة المطاعم على النتيجة)
+    categories = [c for c in categories if c in grid.categories]
+    category_ids = [grid.categories.index(c) for c in categories]
+    if not category_ids:
+        return pd.DataFrame()
+
+    r = grid.radius_index(radius_km)
+    counts = np.asarray(grid.counts[:, :, category_ids, r], dtype="float64")
+    scale = np.log1p(counts.reshape(-1, len(category_ids)).max(axis=0))
+    scale[scale == 0] = 1.0
+    score = (np.log1p(counts) / scale).mean(axis=2)
+
+    flat = np.argsort(score, axis=None)[::-1][:top]
+    rows, cols = np.unravel_index(flat, score.shape)
+
+    records = []
+    for row, col in zip(rows, cols):
+        lat, lon = grid.cell_center(row, col)
+        record = {"خط العرض": round(lat, 6), "خط الطول": round(lon, 6), "التقييم": round(float(score[row, col]) * 100, 1)}
+        for i, (c, category_id) in enumerate(zip(categories, category_ids)):
+            label = category_translation.get(c, c)
+            record[f"عدد {label}"] = int(counts[row, col, i])
+            record[f"أقرب {label} (كم)"] = round(float(grid.nearest_km[row, col, category_id]), 2)
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the Riyadh amenity grid")
+    parser.add_argument("--cell-km", type=float, default=CELL_KM)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=GRID_DIR)
+    args = parser.parse_args()
+
+    store = get_store()
+    start = time.perf_counter()
+    grid = build_grid(
+        store,
+        cell_km=args.cell_km,
+        workers=args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total} chunks", end="", flush=True),
+    )
+    save_grid(grid, args.out)
+    ny, nx = grid.shape
+    print(f"\n{ny}x{nx} cells, {len(grid.categories)} categories, {len(grid.radii_km)} radii "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import re
+import time
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from accessibility import accessibility_profile, profile_summary
+from density import get_density_meta, read_tile
+from instrumentation import prometheus_text, record
+from poi_store import get_store
+from proximity import query_nearby, result_cache
+from startup import is_ready, startup_report, warm_up
+
+# 🔹 واجهة HTTP/JSON خفيفة على نفس محرك الاستعلام المستخدم في التطبيق (بدون Streamlit)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 50.0
+MAX_TOP = 50
+MAX_POINTS = 5000
+MAX_BODY_BYTES = 8 * 1024 * 1024
+DENSITY_TILE_PATH = re.compile(r"^/density/(\w+)/(\d+)/(\d+)/(\d+)\.png$")
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _parse_float(value, name, lo=None, hi=None):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{name}' must be a number") from None
+    if value != value or (lo is not None and value < lo) or (hi is not None and value > hi):
+        raise ApiError(400, f"'{name}' is out of range")
+    return value
+
+
+def _parse_point(point):
+    if isinstance(point, dict):
+        lat, lon = point.get("lat"), point.get("lon")
+    elif isinstance(point, (list, tuple)) and len(point) == 2:
+        lat, lon = point
+    else:
+        raise ApiError(400, "each point must be [lat, lon] or {\"lat\": .., \"lon\": ..}")
+    return (_parse_float(lat, "lat", -90, 90), _parse_float(lon, "lon", -180, 180))
+
+
+def _parse_options(store, categories, radius_km, top):
+    if categories is None:
+        categories = store.categories
+    elif isinstance(categories, str):
+        categories = [c for c in categories.split(",") if c]
+    elif not isinstance(categories, list) or not all(isinstance(c, str) for c in categories):
+        raise ApiError(400, "'categories' must be a list of strings or a comma-separated string")
+    unknown = [c for c in categories if c not in store.category_ranges]
+    if unknown:
+        raise ApiError(400, f"unknown categories: {', '.join(map(str, unknown))}")
+
+    radius_km = _parse_float(DEFAULT_RADIUS_KM if radius_km is None else radius_km, "radius_km", 0, MAX_RADIUS_KM)
+    top = int(_parse_float(3 if top is None else top, "top", 0, MAX_TOP))
+    return list(categories), radius_km, top
+
+
+def nearby_single(query):
+    # 🔹 GET /nearby?lat=..&lon=..&radius_km=..&categories=a,b&top=3
+    store = get_store()
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    location = _parse_point({"lat": params.get("lat"), "lon": params.get("lon")})
+    categories, radius_km, top = _parse_options(store, params.get("categories"), params.get("radius_km"), params.get("top"))
+    return {
+        "location": location,
+        "radius_km": radius_km,
+        "results": query_nearby(store, categories, location, radius_km, top),
+    }
+
+
+def nearby_batch(body):
+    # 🔹 POST /nearby مع {"points": [[lat, lon], ...], "radius_km": .., "categories": [..], "top": ..}
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise ApiError(400, "body must be valid JSON") from None
+    if not isinstance(payload, dict):
+        raise ApiError(400, "body must be a JSON object")
+
+    points = payload.get("points")
+    if points is None and "lat" in payload:
+        points = [payload]
+    if not isinstance(points, list) or not points:
+        raise ApiError(400, "'points' must be a non-empty list")
+    if len(points) > MAX_POINTS:
+        raise ApiError(413, f"at most {MAX_POINTS} points per request")
+
+    store = get_store()
+    locations = [_parse_point(point) for point in points]
+    categories, radius_km, top = _parse_options(store, payload.get("categories"), payload.get("radius_km"), payload.get("top"))
+    return {
+        "radius_km": radius_km,
+        "results": [
+            {"location": location, "results": query_nearby(store, categories, location, radius_km, top)}
+            for location in locations
+        ],
+    }
+
+
+def nearest_profile(query):
+    # 🔹 GET /profile?lat=..&lon=..&categories=a,b: أقرب مكان من كل تصنيف بدون حد للمسافة
+    store = get_store()
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    location = _parse_point({"lat": params.get("lat"), "lon": params.get("lon")})
+    categories, _, _ = _parse_options(store, params.get("categories"), None, None)
+    return {"location": location, "nearest": profile_summary(store, accessibility_profile(store, location, categories))}
+
+
+def density_tile(category, zoom, x, y):
+    # 🔹 GET /density/<category>/<z>/<x>/<y>.png: مربعات جاهزة بنفس ترقيم خرائط الويب (لطبقة Leaflet مثلًا)
+    store = get_store()
+    if category not in store.category_ranges:
+        raise ApiError(404, f"unknown category: {category}")
+    # 🔹 بناء المربعات يأخذ ثواني، فلا يحدث داخل طلب (python startup.py build أو python density.py)
+    if get_density_meta(store, build=False) is None:
+        raise ApiError(503, "density tiles are not built")
+    png = read_tile(store, category, int(zoom), int(x), int(y))
+    if png is None:
+        raise ApiError(404, "empty tile")
+    return png
+
+
+def ready():
+    # 🔹 فحص الجاهزية: 503 حتى يكتمل التسخين، بعدها تقرير زمن التشغيل
+    if not is_ready():
+        raise ApiError(503, "warming up")
+    return startup_report()
+
+
+def health():
+    # 🔹 فحص الحياة: لا يلمس البيانات (get_store قد يحمّلها)، فيرد فورًا حتى أثناء التسخين
+    return {
+        "status": "ok",
+        "startup": startup_report(),
+        "cache": result_cache.stats(),
+    }
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise ApiError(400, "invalid Content-Length") from None
+    if length < 0:
+        raise ApiError(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, version, headers, body
+
+
+def _route_name(target):
+    # 🔹 اسم المسار الثابت لتسمية المقاييس (بدون أرقام المربعات، وأي مسار غير معروف = other)
+    path = urlsplit(target).path
+    if path in ("/health", "/ready", "/metrics", "/nearby", "/profile"):
+        return path
+    if DENSITY_TILE_PATH.match(path):
+        return "/density"
+    return "other"
+
+
+def _route(method, target, body):
+    url = urlsplit(target)
+    if url.path == "/health":
+        return health
+    if url.path == "/ready":
+        return ready
+    if url.path == "/metrics":
+        return prometheus_text
+    # 🔹 كل المسارات الباقية تحتاج البيانات والفهارس: 503 حتى يكتمل التسخين بدل التحميل داخل الطلب
+    if not is_ready():
+        raise ApiError(503, "warming up")
+    if url.path == "/nearby":
+        if method == "GET":
+            return partial(nearby_single, url.query)
+        if method == "POST":
+            return partial(nearby_batch, body)
+        raise ApiError(405, "use GET or POST")
+    if url.path == "/profile":
+        return partial(nearest_profile, url.query)
+    match = DENSITY_TILE_PATH.match(url.path)
+    if match:
+        return partial(density_tile, *match.groups())
+    raise ApiError(404, f"no route for {url.path}")
+
+
+def _response(status, payload, keep_alive):
+    if isinstance(payload, bytes):
+        body, content_type = payload, "image/png"
+    elif isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def handle_connection(reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            keep_alive, route, status, started = False, "other", None, time.perf_counter()
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+
+                # 🔹 الحساب (numpy) في خيط منفصل حتى لا تتوقف حلقة الأحداث
+                started = time.perf_counter()
+                route = _route_name(target)
+                handler = _route(method, target, body)
+                status, payload = 200, await loop.run_in_executor(None, handler)
+            except ApiError as error:
+                status, payload = error.status, {"error": error.message}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as error:  # noqa: BLE001
+                status, payload = 500, {"error": str(error)}
+            finally:
+                # 🔹 كل رد يُسجّل مع حالته (4xx و 5xx و 503 أثناء التسخين كذلك)، إلا إذا انقطع الاتصال قبل الرد
+                if status is not None:
+                    record("api.request", time.perf_counter() - started, path=route, status=status)
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    # 🔹 الاستماع يبدأ فورًا (/health و /ready و /metrics)، والاستعلامات ترجع 503 حتى تُحمّل البيانات والفهارس
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"listening on http://{host}:{port}", flush=True)
+    report = await asyncio.get_running_loop().run_in_executor(None, warm_up)
+    print(f"{report['rows']} POIs ready in {report['ready_after_s']:.2f}s (warm-up {report['warm_ms']:.0f} ms)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve amenities-near-point queries over HTTP/JSON")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
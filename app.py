@@ -1,7 +1,23 @@
-import streamlit as st
+import os
+
+import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
-from scipy.spatial import cKDTree
+import streamlit as st
+
+from amenity_grid import GRID_DIR, best_cells, load_grid
+from categories import CATEGORIES, CATEGORIES_BY_KEY, category_translation
+from cluster_ranking import get_cluster_table, rank_clusters
+from errands import CANDIDATES_PER_CATEGORY, plan_errands
+from geo import DISTANCE_COLUMN
+from incremental import MAX_RADIUS_KM, SessionResults
+from instrumentation import SamplingProfiler, finish_trace, prometheus_text, snapshot, stage, start_trace
+from listings import count_column, listing_features, load_listings, nearest_column, search_listings
+from poi_store import get_store
+from proximity import result_cache
+from ranking import PAGE_SIZE, RANK_LABELS, RANK_MODES, adjusted_ratings, page_count, ranked_page, top_k
+from transit import BUS_CATEGORY, DEFAULT_WALK_M, METRO_CATEGORY, WALK_DISTANCES_M, transit_access
+from road_network import MAX_MINUTES, load_network, network_available, reachable_categories
+from startup import mark_first_render, startup_report, warm_up
 
 # 🔹 إعداد الصفحة
 st.set_page_config(
@@ -9,6 +25,15 @@ st.set_page_config(
     layout="wide"
 )
 
+# 🔹 قياس زمن كل مرحلة في إعادة التشغيل (لوحة المراقبة تظهر مع ?debug=1)
+debug_mode = st.query_params.get("debug") == "1" or os.environ.get("NITAQ_DEBUG") == "1"
+# 🔹 الطلب يبقى حتى تكتمل إعادة تشغيل كاملة (إذا قطعها st.rerun يُقاس التشغيل التالي)
+profiler = SamplingProfiler().start() if st.session_state.get("profile_next_rerun", False) else None
+start_trace("rerun")
+
+# 🔹 أول إعادة تشغيل في العملية تسخّن البيانات والفهارس (مع python startup.py serve تكون جاهزة مسبقًا)
+warm_up()
+
 
 
 
@@ -24,617 +49,376 @@ with st.sidebar:
     user_location = (user_lat, user_lon)
 
     # 🔹 تحديد نطاق البحث
-    radius_km = st.slider("نطاق البحث (كم):", min_value=1.0, max_value=15.0, value=5.0, step=0.5)
-
-    # 🔹 اختيار الخدمات المفضلة
-    services_file = "merged_places.xlsx"
-    df_services = pd.read_excel(services_file, sheet_name='Sheet1', engine="openpyxl")
-
-    category_translation = {
-        "malls": "المولات",
-        "entertainment": "الترفيه",
-        "hospitals_clinics": "المستشفيات والعيادات",
-        "gyms": "الصالات الرياضية",
-        "groceries": "البقالات",
-        "bus": "محطات الباص",
-        "metro": "محطات المترو",
-        "cafes_bakeries": "المقاهي والمخابز",
-        "pharmacies": "الصيدليات",
-        "restaurants": "المطاعم"
-    }
-
-    df_services['Category_Arabic'] = df_services['Category'].map(category_translation)
-    service_types = df_services['Category_Arabic'].dropna().unique().tolist()
+    radius_km = st.slider("نطاق البحث (كم):", min_value=1.0, max_value=MAX_RADIUS_KM, value=5.0, step=0.5)
+
+    # 🔹 اختيار الخدمات المفضلة (البيانات محمّلة مرة واحدة ومشتركة بين الجلسات)
+    with stage("load.store"):
+        poi_store = get_store()
+
+    service_types = [category_translation[c] for c in poi_store.categories if c in category_translation]
 
     selected_services_ar = st.multiselect("اختر الخدمات المفضلة:", service_types, default=service_types[:1] if service_types else [])
 
     # تحويل الاختيارات العربية إلى الأصلية لاستخدامها في التصفية
     selected_services = [key for key, value in category_translation.items() if value in selected_services_ar]
 
-# 🔹 تحميل بيانات الصيدليات فقط
-df_pharmacies = df_services[df_services["Category"] == "pharmacies"]
-
-# 🔹 حساب المسافات للصيدليات
-filtered_pharmacies = []
-for _, row in df_pharmacies.iterrows():
-    pharmacy_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, pharmacy_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_pharmacies.append(row_dict)
-
-filtered_pharmacies_df = pd.DataFrame(filtered_pharmacies)
-# 🔹 عرض إحصائيات الصيدليات فقط إذا تم اختيارها
-if "pharmacies" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+    # 🔹 ترتيب الأماكن داخل كل تصنيف
+    rank_by = st.selectbox("ترتيب الأماكن:", list(RANK_MODES), format_func=RANK_LABELS.get)
 
-    with col1:
-        st.markdown(f"### 🏥 عدد الصيدليات داخل {radius_km} كم: **{len(filtered_pharmacies_df)}**")
-
-        if filtered_pharmacies_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي صيدليات داخل هذا النطاق!**  
-                💀 **إذا مفاصلك تعبانة أو تحتاج دواء يومي، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                فجأة يهجم عليك صداع، تدور بانادول… وما تلاقي إلا مشوار طويل بانتظارك! 🚗  
-                **تبي مغامرة يومية للبحث عن صيدلية؟ ولا تبي صيدلية جنب البقالة؟ القرار لك!** 🔥
-            """, unsafe_allow_html=True)
-        elif len(filtered_pharmacies_df) == 1:
-            pharmacy = filtered_pharmacies_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد الصيدليات في هذا النطاق: 1 فقط!**  
-                📍 **الصيدلية الوحيدة هنا هي:** `{pharmacy['Name']}` وتبعد عنك **{pharmacy['المسافة (كم)']} كم!**  
-                💊 **إذا كنت شخص يعتمد على الأدوية اليومية أو عندك إصابات متكررة، فكر مرتين قبل تسكن هنا، لأن الصيدلية الوحيدة ممكن تكون مغلقة وقت الحاجة!** 😬
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-                📊 **عدد الصيدليات داخل {radius_km} كم: {len(filtered_pharmacies_df)} 💊**  
-                👏 **تقدر تطمن!** لو احتجت بانادول في نص الليل، فيه خيارات متاحة لك 😉  
-                📍 **عندك عدة صيدليات حولك، وما يحتاج تطق مشوار طويل عشان تجيب دواء بسيط!** 🚗💨
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🏥 أقرب 3 صيدليات إليك:")
-            closest_pharmacies = filtered_pharmacies_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_pharmacies.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع الصيدليات**
-            if len(filtered_pharmacies_df) > 3:
-                with st.expander("🔍 عرض جميع الصيدليات"):
-                    st.dataframe(filtered_pharmacies_df[['Name', 'المسافة (كم)']], use_container_width=True)
+    # 🔹 طريقة العرض
+    VIEW_NEARBY = "الخدمات حول موقعك"
+    VIEW_BEST_AREAS = "أفضل المناطق"
+    VIEW_CLUSTERS = "ترتيب الأحياء"
+    VIEW_LISTINGS = "البحث عن سكن"
+    VIEW_MAP = "الخريطة"
+    VIEW_DRIVE = "زمن الوصول بالسيارة"
+    VIEW_ERRANDS = "خطة المشاوير"
+    view_modes = [VIEW_NEARBY, VIEW_MAP, VIEW_ERRANDS, VIEW_BEST_AREAS, VIEW_CLUSTERS, VIEW_LISTINGS]
+    # 🔹 يظهر فقط إذا كان ملف شبكة الطرق موجود (python road_network.py roads.geojson)
+    if network_available():
+        view_modes.insert(1, VIEW_DRIVE)
+    view_mode = st.radio("طريقة العرض:", view_modes)
 
-    with col2:
-        # تحميل الصورة
-        st.image("Pharmacy.webp", use_container_width=True)
 
+@st.cache_resource
+def _cached_amenity_grid(digest, built_at):
+    return load_grid(digest=digest)
 
 
-if "metro" in selected_services:
-    # 🔹 تصفية محطات المترو داخل النطاق المحدد
-    filtered_metro = []
-    for _, row in df_services[df_services["Category"] == "metro"].iterrows():
-        metro_location = (row["Latitude"], row["Longitude"])
-        distance = geodesic(user_location, metro_location).km
-        if distance <= radius_km:
-            row_dict = row.to_dict()
-            row_dict["المسافة (كم)"] = round(distance, 2)
-            filtered_metro.append(row_dict)
+def get_amenity_grid(digest):
+    # 🔹 الشبكة محسوبة مسبقًا (python amenity_grid.py) ومحمّلة بدون نسخ
+    # 🔹 المفتاح يشمل وقت بناء الملف، ولا نخزّن "غير جاهزة" حتى تظهر الشبكة بدون إعادة تشغيل الخادم
+    meta_path = os.path.join(GRID_DIR, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    return _cached_amenity_grid(digest, os.path.getmtime(meta_path))
 
-    # 🔹 تحويل القائمة إلى DataFrame
-    filtered_metro_df = pd.DataFrame(filtered_metro)
 
-    # 🔹 الآن يمكن استخدام `filtered_metro_df` بأمان
-    col1, col2 = st.columns([3, 1])
+def render_category(spec, poi_store, result, radius_km, rank_by, nearest):
+    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
+    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+    names = poi_store.frame["Name"]
 
     with col1:
-        st.markdown(f"### 🚉 عدد محطات المترو داخل {radius_km} كم: **{len(filtered_metro_df)}**")
-
-        if filtered_metro_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي محطات مترو داخل هذا النطاق!**  
-                💀 **إذا كنت تعتمد على المترو يوميًا، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                فجأة تحتاج مشوار سريع، وتكتشف أنك عالق في الزحمة 🚗🚦  
-                **تبي تعيش بدون مترو؟ ولا تبي محطة جنب بيتك؟ القرار لك!** 🔥
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_metro_df) == 1:
-            metro = filtered_metro_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد محطات المترو في هذا النطاق: 1 فقط!**  
-                📍 **المحطة الوحيدة هنا هي:** `{metro['Name']}` وتبعد عنك **{metro['المسافة (كم)']} كم!**  
-                🚆 **إذا كنت تعتمد على المترو يوميًا، فكر مرتين قبل تسكن هنا، لأن المحطة الوحيدة قد تكون بعيدة وقت الحاجة!** 😬
-            """, unsafe_allow_html=True)
-
-        else:
-            st.markdown(f"""
-                📊 **عدد محطات المترو داخل {radius_km} كم: {len(filtered_metro_df)} 🚆**  
-                👏 **تقدر تطمن!** لو احتجت المترو في أي وقت، عندك خيارات متاحة لك 😉  
-                📍 **عندك عدة محطات مترو حولك، وما تحتاج تفكر في الزحمة!** 🚄💨
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🚉 أقرب 3 محطات مترو إليك:")
-            closest_metro = filtered_metro_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_metro.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع محطات المترو**
-            if len(filtered_metro_df) > 3:
-                with st.expander("🔍 عرض جميع محطات المترو"):
-                    st.dataframe(filtered_metro_df[['Name', 'المسافة (كم)']], use_container_width=True)
-
-    with col2:
-        # تحميل صورة لمحطات المترو
-        st.image("Metro.webp", use_container_width=True)
-
+        st.markdown(spec.count_title.format(radius_km=radius_km, count=result.count))
 
-# 🔹 تحميل بيانات الأندية الرياضية فقط
-if "gyms" in selected_services:
-    df_gyms = df_services[df_services["Category"] == "gyms"]
+        if result.count == 0:
+            st.markdown(spec.empty_message, unsafe_allow_html=True)
+            # 🔹 أقرب مكان حتى لو خارج النطاق
+            if nearest.position >= 0:
+                st.markdown(f"📍 **أقرب مكان من {spec.label}:** `{names.iloc[nearest.position]}` ويبعد عنك **{round(nearest.distance_km, 2)} كم**")
 
-    # 🔹 حساب المسافات للأندية الرياضية
-    filtered_gyms = []
-    for _, row in df_gyms.iterrows():
-        gym_location = (row["Latitude"], row["Longitude"])
-        distance = geodesic(user_location, gym_location).km
-        if distance <= radius_km:
-            row_dict = row.to_dict()
-            row_dict["المسافة (كم)"] = round(distance, 2)
-            filtered_gyms.append(row_dict)
-
-    filtered_gyms_df = pd.DataFrame(filtered_gyms)
-
-    # 🔹 تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])
-
-    with col1:
-        st.markdown(f"### 🏋️‍♂️ عدد الأندية الرياضية داخل {radius_km} كم: **{len(filtered_gyms_df)}**")
-
-        if filtered_gyms_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي أندية رياضية داخل هذا النطاق!**  
-                💀 **إذا كنت ناوي تصير فتنس مود، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                بتضطر تتمرن في البيت مع فيديوهات يوتيوب، لأن النادي بعيد جدًا! 🚶‍♂️💨  
-                **تبي نادي قريب، ولا تكتفي بتمارين الضغط في الصالة؟ القرار لك!** 🔥
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_gyms_df) == 1:
-            gym = filtered_gyms_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد الأندية الرياضية في هذا النطاق: 1 فقط!**  
-                📍 **النادي الوحيد هنا هو:** `{gym['Name']}` وتبعد عنك **{gym['المسافة (كم)']} كم!**  
-                🏋️‍♂️ *يعني لو كان زحمة، ما عندك خيارات ثانية! لازم تستحمل الانتظار على الأجهزة الرياضية!* 😬  
-                **هل أنت مستعد لهذا التحدي؟**
-            """, unsafe_allow_html=True)
+        elif result.count == 1:
+            st.markdown(spec.one_message.format(name=names.iloc[result.positions[0]], distance=round(float(result.distances[0]), 2)), unsafe_allow_html=True)
 
         else:
-            st.markdown(f"""
-                📊 **عدد الأندية الرياضية داخل {radius_km} كم: {len(filtered_gyms_df)} 🏋️‍♂️**  
-                👏 *هنيالك! عندك أكثر من خيار، وتقدر تختار النادي اللي يناسبك بدون عناء!* 😉  
-                📍 *ما يحتاج تتمرن في البيت، عندك أندية قريبة توفر لك كل شيء تحتاجه!* 💪🔥
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🏋️‍♂️ أقرب 3 أندية رياضية إليك:")
-            closest_gyms = filtered_gyms_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_gyms.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع الأندية**
-            if len(filtered_gyms_df) > 3:
-                with st.expander("🔍 عرض جميع الأندية"):
-                    st.dataframe(filtered_gyms_df[['Name', 'المسافة (كم)']], use_container_width=True)
+            st.markdown(spec.many_message.format(radius_km=radius_km, count=result.count), unsafe_allow_html=True)
+
+            if rank_by == "distance":
+                st.markdown(spec.closest_title)
+            else:
+                st.markdown(f"### {spec.icon} أفضل 3 - {spec.label} ({RANK_LABELS[rank_by]}):")
+            positions, distances = top_k(poi_store, result, 3, rank_by, radius_km)
+            ratings = adjusted_ratings(poi_store)
+            for position, distance in zip(positions, distances):
+                rating = f" - ⭐ {ratings[position]:.1f}" if rank_by != "distance" else ""
+                st.markdown(f"🔹 **{names.iloc[position]}** - تبعد {round(float(distance), 2)} كم{rating}")
+
+            # 🔹 **إضافة زر لعرض جميع النتائج** (صفحة صفحة بدل جدول كامل)
+            if result.count > 3:
+                with st.expander(spec.expander_label):
+                    pages = page_count(result)
+                    page = 1
+                    if pages > 1:
+                        page = st.number_input("الصفحة:", min_value=1, max_value=pages, value=1, key=f"page_{spec.key}")
+                    st.dataframe(ranked_page(poi_store, result, page, rank_by, radius_km), use_container_width=True)
+                    if pages > 1:
+                        first = (page - 1) * PAGE_SIZE + 1
+                        st.caption(f"{first} - {min(page * PAGE_SIZE, result.count)} من {result.count}")
 
     with col2:
-        # تحميل الصورة
-        st.image("GYM.webp", use_container_width=True)
+        # تحميل الصورة الخاصة بالتصنيف
+        st.image(spec.image, use_container_width=True)
 
 
+def render_accessibility_profile(poi_store, profile):
+    # 🔹 أقرب مكان من كل تصنيف (كل التصنيفات وليس المختارة فقط)
+    with st.expander("🧭 أقرب مكان من كل تصنيف"):
+        names = poi_store.frame["Name"]
+        rows = [
+            {"التصنيف": spec.label, "أقرب مكان": names.iloc[profile[spec.key].position], DISTANCE_COLUMN: round(profile[spec.key].distance_km, 2)}
+            for spec in CATEGORIES
+            if spec.key in profile and profile[spec.key].position >= 0
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
-# 🔹 تصفية بيانات المستشفيات
-df_hospitals = df_services[df_services["Category"] == "hospitals_clinics"]
 
-# 🔹 حساب المسافات للمستشفيات
-filtered_hospitals = []
-for _, row in df_hospitals.iterrows():
-    hospital_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, hospital_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_hospitals.append(row_dict)
+def render_transit_access(poi_store, user_location):
+    st.markdown("### 🚏 الوصول للنقل العام مشيًا")
+    walk_m = st.select_slider("مسافة المشي (متر):", options=list(WALK_DISTANCES_M), value=DEFAULT_WALK_M)
 
-filtered_hospitals_df = pd.DataFrame(filtered_hospitals)
-# 🔹 عرض إحصائيات المستشفيات فقط إذا تم اختيارها
-if "hospitals_clinics" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+    access = transit_access(poi_store, user_location, walk_m)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("خطوط باص مختلفة", access.route_count)
+    col2.metric("محطات باص", access.stops)
+    col3.metric("أقرب محطة مترو (كم)", f"{access.nearest_station_km:.2f}")
 
-    with col1:
-        st.markdown(f"### 🏥 عدد المستشفيات داخل {radius_km} كم: **{len(filtered_hospitals_df)}**")
-
-        if filtered_hospitals_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي مستشفيات داخل هذا النطاق!**  
-                💀 **إذا كنت كثير الإصابات أو لديك مراجعات طبية متكررة، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                🚑 **ما فيه مستشفى قريب؟ يعني لو صادك مغص نص الليل، بتصير عندك مغامرة إسعافية مشوّقة!**  
-                **هل تحب تعيش بعيدًا عن المستشفيات، أم تفضل أن تكون قريبًا من الرعاية الصحية؟ القرار لك!** 🔥
-            """, unsafe_allow_html=True)
-        elif len(filtered_hospitals_df) == 1:
-            hospital = filtered_hospitals_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد المستشفيات في هذا النطاق: 1 فقط!**  
-                📍 **المستشفى الوحيد هنا هو:** `{hospital['Name']}` وتبعد عنك **{hospital['المسافة (كم)']} كم!**  
-                🏥 **إذا كنت تحتاج إلى مستشفى قريب، هذا هو خيارك الوحيد! هل أنت مستعد لهذا التحدي؟** 🤔
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-                📊 **عدد المستشفيات داخل {radius_km} كم: {len(filtered_hospitals_df)} 🏥🚑**  
-                👏 **إذا صار شيء، عندك خيارات كثيرة، وما تحتاج تسوي رحلة عبر القارات عشان توصل للطوارئ!** 😅  
-                📍 **المستشفيات قريبة منك، وصحتك في أمان!** 💉💊
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🏥 أقرب 3 مستشفيات إليك:")
-            closest_hospitals = filtered_hospitals_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_hospitals.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع المستشفيات**
-            if len(filtered_hospitals_df) > 3:
-                with st.expander("🔍 عرض جميع المستشفيات"):
-                    st.dataframe(filtered_hospitals_df[['Name', 'المسافة (كم)']], use_container_width=True)
+    if access.routes:
+        st.markdown("🔹 **أرقام الخطوط:** " + "، ".join(access.routes))
+    if access.stations:
+        st.markdown("🔹 **محطات المترو القريبة:** " + "، ".join(access.stations))
 
-    with col2:
-        # تحميل الصورة
-        st.image("Hospital.webp", use_container_width=True)
-# 🔹 تصفية بيانات المولات
-df_malls = df_services[df_services["Category"] == "malls"]
-
-# 🔹 حساب المسافات للمولات
-filtered_malls = []
-for _, row in df_malls.iterrows():
-    mall_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, mall_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_malls.append(row_dict)
-
-filtered_malls_df = pd.DataFrame(filtered_malls)
-
-# 🔹 عرض إحصائيات المولات فقط إذا تم اختيارها
-if "malls" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
 
-    with col1:
-        st.markdown(f"### 🛍️ عدد المولات داخل {radius_km} كم: **{len(filtered_malls_df)}**")
-
-        if filtered_malls_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي مولات داخل هذا النطاق!**  
-                💀 **إذا كنت من محبي التسوق، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **ما فيه مول قريب؟ يعني لا مقاهي، لا براندات، لا تخفيضات فجائية؟ بتعيش حياة صعبة!** 🥲
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_malls_df) == 1:
-            mall = filtered_malls_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد المولات في هذا النطاق: 1 فقط!**  
-                📍 **المول الوحيد هنا هو:** `{mall['Name']}` وتبعد عنك **{mall['المسافة (كم)']} كم!**  
-                🛍️ **يعني لو كنت تدور على تنوع في المحلات، لا تتحمس… هذا هو خيارك الوحيد!** 😬  
-            """, unsafe_allow_html=True)
+def render_best_areas(grid, selected_services, radius_km):
+    st.markdown(f"### 🏆 أفضل المناطق للخدمات المختارة داخل {radius_km} كم")
 
-        else:
-            st.markdown(f"""
-                📊 **عدد المولات داخل {radius_km} كم: {len(filtered_malls_df)} 🛍️✨**  
-                👏 **هنيالك!** إذا طفشت، عندك خيارات كثيرة للشوبينغ، ما يحتاج تسافر بعيد عشان تشتري جزمة جديدة! 😉  
-                📍 **يعني بكل بساطة، خذ راحتك، وجرب أكثر من مول حسب مزاجك!** 💃🕺
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🛒 أقرب 3 مولات إليك:")
-            closest_malls = filtered_malls_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_malls.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع المولات**
-            if len(filtered_malls_df) > 3:
-                with st.expander("🔍 عرض جميع المولات"):
-                    st.dataframe(filtered_malls_df[['Name', 'المسافة (كم)']], use_container_width=True)
+    if grid is None:
+        st.info("شبكة المناطق غير جاهزة بعد، شغّل: `python amenity_grid.py`")
+    elif not selected_services:
+        st.info("اختر خدمة وحدة على الأقل عشان نرتب لك المناطق 😉")
+    else:
+        st.dataframe(best_cells(grid, selected_services, radius_km), use_container_width=True)
 
-    with col2:
-        # تحميل الصورة الخاصة بالمولات
-        st.image("Mall.webp", use_container_width=True)
-
-# 🔹 تصفية بيانات محلات البقالة والسوبرماركت
-df_groceries = df_services[df_services["Category"] == "groceries"]
-
-# 🔹 حساب المسافات لمحلات السوبرماركت
-filtered_groceries = []
-for _, row in df_groceries.iterrows():
-    grocery_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, grocery_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_groceries.append(row_dict)
-
-filtered_groceries_df = pd.DataFrame(filtered_groceries)
-
-# 🔹 عرض إحصائيات السوبرماركت فقط إذا تم اختيارها
-if "groceries" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
 
-    with col1:
-        st.markdown(f"### 🛒 عدد محلات البقالة داخل {radius_km} كم: **{len(filtered_groceries_df)}**")
-
-        if filtered_groceries_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي محلات بقالة أو سوبرماركت داخل هذا النطاق!**  
-                💀 **إذا كنت من النوع اللي يشتري أكل بيومه، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **يعني إذا خلصت البيض فجأة؟ لازم مشوار عشان تجيب كرتون جديد!** 🥚🚗
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_groceries_df) == 1:
-            grocery = filtered_groceries_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد محلات البقالة في هذا النطاق: 1 فقط!**  
-                📍 **المحل الوحيد هنا هو:** `{grocery['Name']}` وتبعد عنك **{grocery['المسافة (كم)']} كم!**  
-                🛒 **يعني إذا كان زحمة، أو سكّر بدري، فأنت في ورطة! جهّز نفسك لطلب التوصيل أو خزن الأكل مسبقًا!** 😬  
-            """, unsafe_allow_html=True)
+def render_cluster_ranking(poi_store, selected_services):
+    st.markdown("### 🏘️ ترتيب الأحياء حسب أهمية كل خدمة لك")
 
-        else:
-            st.markdown(f"""
-                📊 **عدد محلات البقالة داخل {radius_km} كم: {len(filtered_groceries_df)} 🛒🥦**  
-                👏 **ما يحتاج تشيل هم الأكل، عندك محلات كثيرة تقدر تشتري منها أي وقت!** 😉  
-                📍 **لو نسيت تشتري خبز، ما يحتاج مشوار طويل، أقرب بقالة عندك!** 🍞🥛
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🛒 أقرب 3 محلات بقالة إليك:")
-            closest_groceries = filtered_groceries_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_groceries.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع محلات البقالة**
-            if len(filtered_groceries_df) > 3:
-                with st.expander("🔍 عرض جميع محلات البقالة"):
-                    st.dataframe(filtered_groceries_df[['Name', 'المسافة (كم)']], use_container_width=True)
+    if not selected_services:
+        st.info("اختر خدمة وحدة على الأقل عشان نرتب لك الأحياء 😉")
+        return
 
-    with col2:
-        # تحميل الصورة الخاصة بالسوبرماركت
-        st.image("supermarket.webp", use_container_width=True)
-
-# 🔹 تصفية بيانات أماكن الترفيه
-df_entertainment = df_services[df_services["Category"] == "entertainment"]
-
-# 🔹 حساب المسافات لأماكن الترفيه
-filtered_entertainment = []
-for _, row in df_entertainment.iterrows():
-    entertainment_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, entertainment_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_entertainment.append(row_dict)
-
-filtered_entertainment_df = pd.DataFrame(filtered_entertainment)
-
-# 🔹 عرض إحصائيات أماكن الترفيه فقط إذا تم اختيارها
-if "entertainment" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+    # 🔹 وزن لكل خدمة مختارة (مثلاً المترو ×3 والنوادي ×1)
+    weights = {}
+    weight_cols = st.columns(min(len(selected_services), 4))
+    for i, key in enumerate(selected_services):
+        spec = CATEGORIES_BY_KEY[key]
+        with weight_cols[i % len(weight_cols)]:
+            weights[key] = st.slider(f"{spec.icon} {spec.label}", min_value=0, max_value=5, value=1, key=f"weight_{key}")
 
-    with col1:
-        st.markdown(f"### 🎭 عدد أماكن الترفيه داخل {radius_km} كم: **{len(filtered_entertainment_df)}**")
-
-        if filtered_entertainment_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي أماكن ترفيه داخل هذا النطاق!**  
-                💀 **إذا كنت تحب الطلعات والأماكن الحماسية، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **يعني لا سينما، لا ملاهي، لا جلسات حلوة؟! الحياة بتكون مملة جدًا! 😭**
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_entertainment_df) == 1:
-            entertainment = filtered_entertainment_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد أماكن الترفيه في هذا النطاق: 1 فقط!**  
-                📍 **المكان الوحيد هنا هو:** `{entertainment['Name']}` وتبعد عنك **{entertainment['المسافة (كم)']} كم!**  
-                🎢 **يعني لو طفشت، عندك خيار واحد فقط! تحب تكرر نفس المشوار؟ ولا تفضل يكون عندك تنوع؟** 🤔
-            """, unsafe_allow_html=True)
+    st.dataframe(rank_clusters(get_cluster_table(poi_store), weights), use_container_width=True)
 
-        else:
-            st.markdown(f"""
-                📊 **عدد أماكن الترفيه داخل {radius_km} كم: {len(filtered_entertainment_df)} 🎢🎭**  
-                👏 **يا حظك! عندك أماكن كثيرة للترفيه، يعني ما فيه ملل أبد!** 😍  
-                📍 **إذا كنت تحب السينما، الألعاب، أو الجلسات الممتعة، تقدر تخطط لطلعات بدون تفكير!** 🍿🎮
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🎭 أقرب 3 أماكن ترفيه إليك:")
-            closest_entertainment = filtered_entertainment_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_entertainment.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع أماكن الترفيه**
-            if len(filtered_entertainment_df) > 3:
-                with st.expander("🔍 عرض جميع أماكن الترفيه"):
-                    st.dataframe(filtered_entertainment_df[['Name', 'المسافة (كم)']], use_container_width=True)
 
-    with col2:
-        # تحميل الصورة الخاصة بأماكن الترفيه
-        st.image("Event.webp", use_container_width=True)
-
-# 🔹 تصفية بيانات المقاهي والمخابز
-df_cafes_bakeries = df_services[df_services["Category"] == "cafes_bakeries"]
-
-# 🔹 حساب المسافات للمقاهي والمخابز
-filtered_cafes_bakeries = []
-for _, row in df_cafes_bakeries.iterrows():
-    cafe_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, cafe_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_cafes_bakeries.append(row_dict)
-
-filtered_cafes_bakeries_df = pd.DataFrame(filtered_cafes_bakeries)
-
-# 🔹 عرض إحصائيات المقاهي والمخابز فقط إذا تم اختيارها
-if "cafes_bakeries" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+def render_listing_search(poi_store, selected_services):
+    st.markdown("### 🏠 ابحث عن سكن قريب من خدماتك")
 
-    with col1:
-        st.markdown(f"### ☕ عدد المقاهي والمخابز داخل {radius_km} كم: **{len(filtered_cafes_bakeries_df)}**")
-
-        if filtered_cafes_bakeries_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي مقاهي أو مخابز داخل هذا النطاق!**  
-                💀 **إذا كنت من مدمني القهوة أو عاشق الدونات، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **يعني لا كابتشينو صباحي؟ لا كرواسون طازج؟ بتعيش حياة جافة جدًا! 😭☕🥐**
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_cafes_bakeries_df) == 1:
-            cafe = filtered_cafes_bakeries_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد المقاهي والمخابز في هذا النطاق: 1 فقط!**  
-                📍 **المكان الوحيد هنا هو:** `{cafe['Name']}` وتبعد عنك **{cafe['المسافة (كم)']} كم!**  
-                ☕ **يعني لو طفشت من نفس المقهى، ما عندك غيره! تحب تكرر نفس القهوة كل يوم؟ ولا تفضّل تنوع؟** 🤔
-            """, unsafe_allow_html=True)
-
-        else:
-            st.markdown(f"""
-                📊 **عدد المقاهي والمخابز داخل {radius_km} كم: {len(filtered_cafes_bakeries_df)} ☕🍩**  
-                👏 **أنت في نعيم! عندك مقاهي ومخابز كثيرة، يعني صباحاتك بتكون مثالية وكل يوم تجرب شيء جديد!** 😍  
-                📍 **سواء تحب اللاتيه، الإسبريسو، أو الدونات، الخيارات عندك كثيرة!** 🥐☕
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🍩 أقرب 3 مقاهي ومخابز إليك:")
-            closest_cafes_bakeries = filtered_cafes_bakeries_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_cafes_bakeries.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع المقاهي والمخابز**
-            if len(filtered_cafes_bakeries_df) > 3:
-                with st.expander("🔍 عرض جميع المقاهي والمخابز"):
-                    st.dataframe(filtered_cafes_bakeries_df[['Name', 'المسافة (كم)']], use_container_width=True)
-
-    with col2:
-        # تحميل الصورة الخاصة بالمقاهي والمخابز
-        st.image("Cafe.webp", use_container_width=True)
-
-# 🔹 تصفية بيانات المطاعم
-df_restaurants = df_services[df_services["Category"] == "restaurants"]
-
-# 🔹 حساب المسافات للمطاعم
-filtered_restaurants = []
-for _, row in df_restaurants.iterrows():
-    restaurant_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, restaurant_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_restaurants.append(row_dict)
-
-filtered_restaurants_df = pd.DataFrame(filtered_restaurants)
-
-# 🔹 عرض إحصائيات المطاعم فقط إذا تم اختيارها
-if "restaurants" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
+    listings = load_listings()
+    features = listing_features(poi_store, listings)
 
+    col1, col2, col3 = st.columns(3)
     with col1:
-        st.markdown(f"### 🍽️ عدد المطاعم داخل {radius_km} كم: **{len(filtered_restaurants_df)}**")
-
-        if filtered_restaurants_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي مطاعم داخل هذا النطاق!**  
-                💀 **إذا كنت تعتمد على المطاعم وما تطبخ، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **يعني لا برجر، لا بيتزا، لا شاورما؟ بتعيش على النودلز والبيض المقلي؟ 🥲🍳**
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_restaurants_df) == 1:
-            restaurant = filtered_restaurants_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد المطاعم في هذا النطاق: 1 فقط!**  
-                📍 **المطعم الوحيد هنا هو:** `{restaurant['Name']}` وتبعد عنك **{restaurant['المسافة (كم)']} كم!**  
-                🍽️ **يعني لو ما عجبك، مالك إلا تطبخ بنفسك! تبي تعيش على منيو محدود؟ ولا تفضل يكون عندك تنوع؟** 🤔
-            """, unsafe_allow_html=True)
-
-        else:
-            st.markdown(f"""
-                📊 **عدد المطاعم داخل {radius_km} كم: {len(filtered_restaurants_df)} 🍔🍕**  
-                👏 **هنيالك! عندك مطاعم كثيرة، يعني خياراتك مفتوحة سواء تبغى شاورما، سوشي، ولا مندي!** 😍  
-                📍 **كل يوم تقدر تجرب مطعم جديد، وما فيه ملل أبد!** 🍛🍣
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🍔 أقرب 3 مطاعم إليك:")
-            closest_restaurants = filtered_restaurants_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_restaurants.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع المطاعم**
-            if len(filtered_restaurants_df) > 3:
-                with st.expander("🔍 عرض جميع المطاعم"):
-                    st.dataframe(filtered_restaurants_df[['Name', 'المسافة (كم)']], use_container_width=True)
-
+        low, high = int(listings["price_per_month"].min()), int(listings["price_per_month"].max())
+        price_range = st.slider("السعر الشهري (ريال):", min_value=low, max_value=high, value=(low, min(high, 30000)), step=500)
     with col2:
-        # تحميل الصورة الخاصة بالمطاعم
-        st.image("restaurant.webp", use_container_width=True)
-# 🔹 تصفية بيانات محطات الباص
-df_bus_stations = df_services[df_services["Category"] == "bus"]
-
-# 🔹 حساب المسافات لمحطات الباص
-filtered_bus_stations = []
-for _, row in df_bus_stations.iterrows():
-    bus_location = (row["Latitude"], row["Longitude"])
-    distance = geodesic(user_location, bus_location).km
-    if distance <= radius_km:
-        row_dict = row.to_dict()
-        row_dict["المسافة (كم)"] = round(distance, 2)
-        filtered_bus_stations.append(row_dict)
-
-filtered_bus_stations_df = pd.DataFrame(filtered_bus_stations)
-
-# 🔹 عرض إحصائيات محطات الباص فقط إذا تم اختيارها
-if "bus" in selected_services:
-    # تقسيم الصفحة إلى عمودين: النص في اليسار والصورة في اليمين
-    col1, col2 = st.columns([3, 1])  # العمود الأول أكبر ليحتوي على النص
-
-    with col1:
-        st.markdown(f"### 🚌 عدد محطات الباص داخل {radius_km} كم: **{len(filtered_bus_stations_df)}**")
-
-        if filtered_bus_stations_df.empty:
-            st.markdown("""
-                🚨 **لا توجد أي محطات باص داخل هذا النطاق!**  
-                💀 **إذا كنت تعتمد على الباصات في تنقلاتك، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
-                **يعني لازم تمشي مشوار محترم عشان تلقى محطة؟ بتصير خبير في المشي بالغصب! 🚶‍♂️😂**
-            """, unsafe_allow_html=True)
-
-        elif len(filtered_bus_stations_df) == 1:
-            bus_station = filtered_bus_stations_df.iloc[0]
-            st.markdown(f"""
-                ⚠️ **عدد محطات الباص في هذا النطاق: 1 فقط!**  
-                📍 **المحطة الوحيدة هنا هي:** `{bus_station['Name']}` وتبعد عنك **{bus_station['المسافة (كم)']} كم!**  
-                🚌 *🚏 يعني لو فاتك الباص، لا تشيل هم، بعد ٦ دقايق بيجيك الثاني! بس المشكلة؟ إذا كانت المحطة بعيدة، بتتمشى مشوار محترم كل مرة! 😬 تبي تعتمد على محطة وحدة؟ ولا تفضل يكون عندك خيارات أقرب؟* 🤔
-            """, unsafe_allow_html=True)
-
+        min_rating = st.slider("أقل تقييم:", min_value=0.0, max_value=5.0, value=4.0, step=0.1)
+    with col3:
+        sort_labels = {"amenities": "الأقرب للخدمات", "price": "الأرخص", "rating": "الأعلى تقييمًا"}
+        sort_by = st.selectbox("الترتيب:", list(sort_labels), format_func=sort_labels.get)
+
+    # 🔹 أقصى مسافة مقبولة لأقرب خدمة من كل نوع مختار
+    max_nearest_km = {}
+    if selected_services:
+        with st.expander("📍 أقصى مسافة لأقرب خدمة"):
+            for key in selected_services:
+                spec = CATEGORIES_BY_KEY[key]
+                max_nearest_km[key] = st.slider(f"{spec.icon} {spec.label} (كم)", min_value=0.5, max_value=10.0, value=10.0, step=0.5, key=f"max_{key}")
+
+    found = search_listings(listings, features, price_range, min_rating, max_nearest_km, sort_by)
+    st.markdown(f"**عدد الإعلانات المطابقة: {len(found)}**")
+
+    columns = {"name": "الاسم", "price_per_month": "السعر الشهري", "rating": "التقييم", "Cluster_Name": "المنطقة"}
+    for key in selected_services:
+        label = CATEGORIES_BY_KEY[key].label
+        columns[count_column(key, 1.0)] = f"{label} خلال 1 كم"
+        columns[nearest_column(key)] = f"أقرب {label} (كم)"
+    columns["URL"] = "الرابط"
+
+    table = found[list(columns)].rename(columns=columns).round(2)
+    st.dataframe(table, use_container_width=True, hide_index=True, column_config={"الرابط": st.column_config.LinkColumn()})
+
+
+def render_map(poi_store, selected_services, user_location, radius_km):
+    # 🔹 مكتبات الخريطة (folium) ثقيلة، تُحمّل فقط عند فتح الخريطة
+    from streamlit_folium import st_folium
+
+    from density import get_density_meta, read_tile, tiles_in_view
+    from map_view import (
+        bounds_around,
+        build_base_map,
+        build_density_layer,
+        build_marker_layer,
+        get_cluster_levels,
+        markers_in_view,
+        zoom_for_radius,
+    )
+
+    st.markdown(f"### 🗺️ الخدمات المختارة على الخريطة (نطاق {radius_km} كم)")
+
+    # 🔹 حدود الخريطة ومستوى التكبير من آخر تحريك للخريطة (أو حول موقعك أول مرة)
+    map_key = (user_location, radius_km)
+    view = st.session_state.get("map_view")
+    if view is None or view["key"] != map_key:
+        view = {"key": map_key, "bounds": bounds_around(user_location, radius_km), "zoom": zoom_for_radius(radius_km)}
+        st.session_state["map_view"] = view
+
+    # 🔹 خريطة الكثافة: مربعات محسوبة مسبقًا، فتغيير التصنيف مجرد قراءة للمربعات الظاهرة
+    density_category = st.selectbox(
+        "خريطة الكثافة:",
+        [None] + [c for c in poi_store.categories if c in category_translation],
+        format_func=lambda c: "بدون" if c is None else category_translation[c],
+    )
+    layers = []
+    if density_category is not None:
+        # 🔹 المربعات الجاهزة فقط: بناؤها يأخذ ثواني فلا يحدث داخل إعادة تشغيل المستخدم
+        density_meta = get_density_meta(poi_store, build=False)
+        if density_meta is None:
+            st.info("خريطة الكثافة غير جاهزة بعد، شغّل: `python density.py`")
         else:
-            st.markdown(f"""
-                📊 **عدد محطات الباص داخل {radius_km} كم: {len(filtered_bus_stations_df)} 🚌🚏**  
-                👏 **يا سلام! عندك محطات باص كثيرة، تنقلاتك صارت سهلة وما تحتاج تنتظر طويل!** 😍  
-                📍 **ما تحتاج تمشي كثير، أقرب محطة جنبك، ومستعد تنطلق لمشاويرك!** 🚍💨
-            """, unsafe_allow_html=True)
-
-            st.markdown("### 🚏 أقرب 3 محطات باص إليك:")
-            closest_bus_stations = filtered_bus_stations_df.nsmallest(3, "المسافة (كم)")
-            for _, row in closest_bus_stations.iterrows():
-                st.markdown(f"🔹 **{row['Name']}** - تبعد {row['المسافة (كم)']} كم")
-
-            # 🔹 **إضافة زر لعرض جميع محطات الباص**
-            if len(filtered_bus_stations_df) > 3:
-                with st.expander("🔍 عرض جميع محطات الباص"):
-                    st.dataframe(filtered_bus_stations_df[['Name', 'المسافة (كم)']], use_container_width=True)
-
-    with col2:
-        # تحميل الصورة الخاصة بمحطات الباص
-        st.image("bus.webp", use_container_width=True)
+            with stage("map.density", category=density_category):
+                scale = density_meta["categories"][density_category]["max_per_km2"]
+                tiles = [(tile, read_tile(poi_store, density_category, *tile)) for tile in tiles_in_view(view["bounds"], view["zoom"])]
+            layers.append(build_density_layer(tiles))
+            st.caption(f"اللون الأغمق ≈ {scale:g} مكان لكل كم² أو أكثر")
+
+    markers = markers_in_view(get_cluster_levels(poi_store), selected_services, view["bounds"], view["zoom"])
+    layers.append(build_marker_layer(markers, selected_services))
+    st.caption(f"عدد العلامات المعروضة: {len(markers)}")
+
+    state = st_folium(
+        build_base_map(user_location, radius_km),
+        key=f"poi_map_{user_location}_{radius_km}",
+        height=600,
+        use_container_width=True,
+        feature_group_to_add=layers,
+        returned_objects=["bounds", "zoom"],
+    )
+
+    # 🔹 إذا تحركت الخريطة نعيد حساب العلامات للحدود الجديدة فقط
+    bounds = (state or {}).get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    if south_west.get("lat") is not None and north_east.get("lat") is not None:
+        new_bounds = tuple(round(v, 4) for v in (south_west["lat"], south_west["lng"], north_east["lat"], north_east["lng"]))
+        new_zoom = state.get("zoom") or view["zoom"]
+        if new_bounds != tuple(round(v, 4) for v in view["bounds"]) or new_zoom != view["zoom"]:
+            st.session_state["map_view"] = {"key": map_key, "bounds": new_bounds, "zoom": new_zoom}
+            st.rerun()
+
+
+def render_drive_time(poi_store, selected_services, user_location):
+    st.markdown("### 🚗 الخدمات التي تصلها بالسيارة")
+    minutes = st.slider("زمن القيادة (دقيقة):", min_value=1, max_value=MAX_MINUTES, value=10)
+
+    results = reachable_categories(load_network(), poi_store, selected_services, user_location, minutes)
+    for spec in CATEGORIES:
+        if spec.key not in results:
+            continue
+        result = results[spec.key]
+        st.markdown(f"#### {spec.icon} {spec.label}: {result.count} خلال {minutes} دقيقة")
+        if result.count:
+            table = poi_store.frame[["Name"]].iloc[result.positions[:10]].reset_index(drop=True)
+            table["الوقت (دقيقة)"] = np.round(result.minutes[:10], 1)
+            st.dataframe(table, use_container_width=True, hide_index=True)
+
+
+def render_errands(poi_store, selected_services, user_location):
+    st.markdown("### 🛒 خطة المشاوير: مكان واحد من كل خدمة مختارة بأقصر جولة من بيتك والعودة")
+    plan = plan_errands(poi_store, selected_services, user_location)
+    if plan is None:
+        st.info("اختر خدمة واحدة على الأقل.")
+        return
+
+    names = poi_store.frame["Name"]
+    rows = [
+        {
+            "المحطة": i + 1,
+            "الخدمة": CATEGORIES_BY_KEY[category].label if category in CATEGORIES_BY_KEY else category,
+            "المكان": names.iloc[position],
+            "المسافة من المحطة السابقة (كم)": round(float(leg), 2),
+        }
+        for i, (category, position, leg) in enumerate(zip(plan.categories, plan.positions, plan.legs_km))
+    ]
+    rows.append({"المحطة": len(rows) + 1, "الخدمة": "🏠", "المكان": "العودة للبيت", "المسافة من المحطة السابقة (كم)": round(float(plan.legs_km[-1]), 2)})
+
+    st.metric("طول الجولة (خط مستقيم)", f"{plan.total_km:.2f} كم")
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    if plan.method != "exact":
+        st.caption("⏱️ انتهى وقت البحث الكامل، والخطة من أقرب خيار في كل خطوة.")
+    elif plan.complete:
+        st.caption("✅ هذه أقصر جولة ممكنة بين كل الأماكن.")
+    else:
+        st.caption(f"أقصر جولة بين أقرب {CANDIDATES_PER_CATEGORY} أماكن من كل خدمة.")
+
+
+def render_debug_panel(trace):
+    with st.sidebar.expander("🛠️ لوحة المراقبة", expanded=True):
+        st.markdown(f"**زمن إعادة التشغيل:** {trace.total_ms:.1f} ms")
+        st.dataframe(pd.DataFrame(trace.stages), use_container_width=True, hide_index=True)
+
+        cache = result_cache.stats()
+        st.markdown(f"**الذاكرة المؤقتة:** {cache['entries']} عنصر، نسبة الإصابة {cache['hit_rate']:.0%}")
+
+        st.markdown("**المجموع منذ بدء التشغيل**")
+        st.dataframe(pd.DataFrame(snapshot()), use_container_width=True, hide_index=True)
+        st.download_button("تحميل المقاييس (Prometheus)", prometheus_text(), file_name="metrics.txt")
+
+        st.markdown("**بدء التشغيل**")
+        st.json(startup_report(), expanded=False)
+
+        # 🔹 ملف أداء (flame graph) لإعادة تشغيل وحدة بنفس الاختيارات الحالية
+        if st.button("تسجيل ملف أداء لإعادة التشغيل"):
+            st.session_state["profile_next_rerun"] = True
+            st.rerun()
+        if "last_profile" in st.session_state:
+            st.caption(f"آخر ملف أداء: `{st.session_state['last_profile']}`")
+
+
+if view_mode == VIEW_BEST_AREAS:
+    with stage("view", view=view_mode):
+        render_best_areas(get_amenity_grid(poi_store.digest), selected_services, radius_km)
+
+elif view_mode == VIEW_CLUSTERS:
+    with stage("view", view=view_mode):
+        render_cluster_ranking(poi_store, selected_services)
+
+elif view_mode == VIEW_LISTINGS:
+    with stage("view", view=view_mode):
+        render_listing_search(poi_store, selected_services)
+
+elif view_mode == VIEW_DRIVE:
+    with stage("view", view=view_mode):
+        render_drive_time(poi_store, selected_services, user_location)
+
+elif view_mode == VIEW_ERRANDS:
+    with stage("view", view=view_mode):
+        render_errands(poi_store, selected_services, user_location)
+
+elif view_mode == VIEW_MAP:
+    with stage("view", view=view_mode):
+        render_map(poi_store, selected_services, user_location, radius_km)
+
+else:
+    # 🔹 المسافات محفوظة في الجلسة للموقع الحالي: تغيير النطاق أو التصنيفات لا يعيد حساب الموجود
+    selected_specs = [spec for spec in CATEGORIES if spec.key in selected_services]
+    session_results = st.session_state.setdefault("nearby_results", SessionResults())
+    with stage("query") as span:
+        results = session_results.results(poi_store, [spec.key for spec in selected_specs], user_location, radius_km)
+        span.rows = sum(result.count for result in results.values())
+    with stage("query.profile"):
+        profile = session_results.profile(poi_store, user_location)
+
+    for spec in selected_specs:
+        with stage("render", category=spec.key):
+            render_category(spec, poi_store, results[spec.key], radius_km, rank_by, profile[spec.key])
+
+    if BUS_CATEGORY in selected_services or METRO_CATEGORY in selected_services:
+        with stage("render", category="transit"):
+            render_transit_access(poi_store, user_location)
+
+    render_accessibility_profile(poi_store, profile)
+
+trace = finish_trace()
+mark_first_render()
+if profiler is not None:
+    st.session_state.pop("profile_next_rerun", None)
+    st.session_state["last_profile"] = profiler.stop().write()
+if debug_mode:
+    render_debug_panel(trace)
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import DISTANCE_MODES, distances_km  # noqa: E402
+from poi_store import get_store  # noqa: E402
+
+# 🔹 مقارنة السرعة والدقة بين geodesic لكل صف والحساب الدفعي على البيانات الحقيقية
+DEFAULT_LOCATION = (24.7136, 46.6753)
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched distances against geopy.geodesic")
+    parser.add_argument("--lat", type=float, default=DEFAULT_LOCATION[0])
+    parser.add_argument("--lon", type=float, default=DEFAULT_LOCATION[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=15.0, help="error is also reported for POIs within this radius")
+    args = parser.parse_args()
+
+    location = (args.lat, args.lon)
+    store = get_store()
+    categories = store.frame["Category"].to_numpy()
+
+    header = f"{'category':<20}{'rows':>7}{'geodesic ms':>13}" + "".join(
+        f"{mode + ' ms':>15}{'speedup':>9}{'max err m':>11}" for mode in DISTANCE_MODES
+    )
+    print(header)
+    print("-" * len(header))
+
+    for category in store.categories:
+        mask = categories == category
+        lats = store.lat[mask]
+        lons = store.lon[mask]
+
+        ref_time, reference = time_call(
+            lambda: np.array([geodesic(location, (la, lo)).km for la, lo in zip(lats, lons)]),
+            1,
+        )
+        near = reference <= args.radius
+
+        line = f"{category:<20}{len(lats):>7}{ref_time * 1000:>13.1f}"
+        for mode in DISTANCE_MODES:
+            elapsed, result = time_call(lambda: distances_km(location, lats, lons, mode), args.repeat)
+            err_m = np.abs(result[near] - reference[near]).max() * 1000 if near.any() else 0.0
+            line += f"{elapsed * 1000:>15.2f}{ref_time / elapsed:>8.0f}x{err_m:>11.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from errands import TIME_BUDGET_S, plan_errands  # noqa: E402
+from poi_store import get_store  # noqa: E402
+from spatial_index import get_category_indexes  # noqa: E402
+
+# 🔹 زمن خطة المشاوير حسب عدد التصنيفات وعدد المرشحين لكل تصنيف، وجودة الحل البديل (greedy)
+CITY_CENTER_BOUNDS = (24.55, 46.55, 24.85, 46.85)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the errand planner")
+    parser.add_argument("--points", type=int, default=20)
+    parser.add_argument("--categories", default="2,4,6,8,10")
+    parser.add_argument("--candidates", default="3,5,8,12")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET_S, help="time budget in seconds")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    store = get_store()
+    get_category_indexes(store)
+    rng = np.random.default_rng(0)
+    south, west, north, east = CITY_CENTER_BOUNDS
+    points = np.column_stack((rng.uniform(south, north, args.points), rng.uniform(west, east, args.points)))
+
+    print(f"{'cats':>4} {'k':>3}  {'p50 ms':>8} {'p95 ms':>8}  exact  provably-optimal  greedy +%")
+    for m in (int(v) for v in args.categories.split(",")):
+        categories = store.categories[:m]
+        for k in (int(v) for v in args.candidates.split(",")):
+            timings, exact, complete, excess = [], 0, 0, []
+            for lat, lon in points:
+                plan = plan_errands(store, categories, (lat, lon), candidates=k, time_budget_s=args.budget)
+                greedy = plan_errands(store, categories, (lat, lon), candidates=k, time_budget_s=0)
+                timings.append(plan.elapsed_ms)
+                exact += plan.method == "exact"
+                complete += plan.complete
+                excess.append((greedy.total_km / plan.total_km - 1) * 100)
+            p50, p95 = np.percentile(timings, [50, 95])
+            print(f"{m:>4} {k:>3}  {p50:8.2f} {p95:8.2f}  {exact / len(points):5.0%}  {complete / len(points):16.0%}  "
+                  f"{np.mean(excess):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from incremental import MAX_RADIUS_KM, SessionResults  # noqa: E402
+from poi_store import SERVICES_FILE, SERVICES_SHEET, get_store  # noqa: E402
+from proximity import query_categories  # noqa: E402
+
+# 🔹 حجم البيانات المشتركة في الذاكرة، والزيادة لكل جلسة (ما يبقى في st.session_state فقط)
+DEFAULT_LOCATION = (24.7136, 46.6753)
+
+
+def frame_mb(frame):
+    return frame.memory_usage(deep=True).sum() / 2**20
+
+
+def per_session_bytes(store, sessions, location, radius_km):
+    # 🔹 كل "جلسة" تحتفظ بنفس ما يحفظه التطبيق في الجلسة: SessionResults (مسافات مرتبة حتى MAX_RADIUS_KM + ملف الوصول)
+    # 🔹 جداول الصفحات (ranked_page) تُبنى وقت العرض ولا تبقى في الجلسة
+    query_categories(store, store.categories, location, MAX_RADIUS_KM)  # الذاكرة المؤقتة المشتركة جاهزة مسبقًا
+    SessionResults().profile(store, location)  # شبكة أقرب مكان المشتركة جاهزة مسبقًا
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = []
+    for _ in range(sessions):
+        session = SessionResults()
+        session.results(store, store.categories, location, radius_km)
+        session.profile(store, location)
+        kept.append(session)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = sum(result.count for result in kept[0].full.values())
+    return (after - before) / sessions, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure shared POI memory and per-session overhead")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--compare-excel", action="store_true", help="also measure the raw pd.read_excel frame")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    store = get_store()
+    print(f"shared store: {len(store.frame)} rows, {frame_mb(store.frame):.2f} MB")
+    usage = store.frame.memory_usage(deep=True, index=False) / 2**20
+    for column, mb in usage.sort_values(ascending=False).items():
+        print(f"  {column:<20}{str(store.frame[column].dtype):<12}{mb:>8.3f} MB")
+
+    if args.compare_excel:
+        raw = pd.read_excel(SERVICES_FILE, sheet_name=SERVICES_SHEET, engine="openpyxl")
+        print(f"raw pd.read_excel frame: {frame_mb(raw):.2f} MB")
+
+    per_session, rows = per_session_bytes(store, args.sessions, DEFAULT_LOCATION, args.radius)
+    print(f"per session ({rows} sorted results up to {MAX_RADIUS_KM:g} km, all categories): {per_session / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from geopy.distance import geodesic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import poi_store  # noqa: E402
+from proximity import query_categories, result_cache  # noqa: E402
+from spatial_index import get_store_index  # noqa: E402
+
+# 🔹 قياس كل مرحلة في سلسلة الاستعلام على بيانات الرياض الحقيقية + التحقق من صحة النتائج مقابل geodesic
+FIXED_POINTS = {
+    "olaya": (24.7136, 46.6753),
+    "malqa": (24.8090, 46.6110),
+    "rawdah": (24.7400, 46.7700),
+    "shifa": (24.5650, 46.7150),
+    "diplomatic_quarter": (24.6820, 46.6240),
+}
+RADII_KM = (1.0, 5.0, 15.0)
+TOP_K = 3
+DISTANCE_TOLERANCE_KM = 0.001
+REGRESSION_RATIO = 1.25
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def traced(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_load(path, repeat):
+    # 🔹 قراءة الإكسل كاملة (مثل التطبيق الأصلي) مقابل التحميل من النسخة المحوّلة المحفوظة
+    _, _, parse_peak = traced(lambda: poi_store._parse_source(path, poi_store.SERVICES_SHEET))
+    parse_s = best_of(lambda: poi_store._parse_source(path, poi_store.SERVICES_SHEET), repeat)
+
+    signature = poi_store._file_signature(path)
+    digest = poi_store._file_digest(path)
+    store, _, store_peak = traced(lambda: poi_store._build_store(path, poi_store.SERVICES_SHEET, signature, digest))
+    cached_s = best_of(lambda: poi_store._build_store(path, poi_store.SERVICES_SHEET, signature, digest), repeat)
+    index_s = best_of(lambda: get_store_index(poi_store._build_store(path, poi_store.SERVICES_SHEET, signature, digest)), 1) - cached_s
+    return {
+        "excel_parse_s": parse_s,
+        "excel_parse_peak_mb": parse_peak / 2**20,
+        "cached_load_s": cached_s,
+        "cached_load_peak_mb": store_peak / 2**20,
+        "index_build_s": max(index_s, 0.0),
+        "rows": len(store.frame),
+    }
+
+
+def bench_categories(store, location, radius_km, repeat):
+    timings = {}
+    for category in store.categories:
+        def cold():
+            result_cache.invalidate()
+            query_categories(store, [category], location, radius_km)
+
+        timings[category] = best_of(cold, repeat) * 1000
+    return timings
+
+
+def bench_points(store, repeat):
+    results = {}
+    for name, location in FIXED_POINTS.items():
+        for radius_km in RADII_KM:
+            def cold():
+                result_cache.invalidate()
+                query_categories(store, store.categories, location, radius_km)
+
+            cold_ms = best_of(cold, repeat) * 1000
+            warm_ms = best_of(lambda: query_categories(store, store.categories, location, radius_km), repeat) * 1000
+            results[f"{name}@{radius_km:g}km"] = {"cold_ms": cold_ms, "warm_ms": warm_ms}
+    return results
+
+
+def check_correctness(store):
+    # 🔹 المرجع: نفس حلقة geodesic في النسخة الأصلية من التطبيق على كل الصفوف
+    failures = []
+    checked = 0
+    for name, location in FIXED_POINTS.items():
+        reference = {}
+        for category, (start, stop) in store.category_ranges.items():
+            reference[category] = np.array([
+                geodesic(location, (lat, lon)).km
+                for lat, lon in zip(store.lat[start:stop], store.lon[start:stop])
+            ])
+
+        for radius_km in RADII_KM:
+            results = query_categories(store, store.categories, location, radius_km)
+            for category, result in results.items():
+                checked += 1
+                expected = np.sort(reference[category][reference[category] <= radius_km])
+                _, top = result.top(TOP_K)
+                if result.count != len(expected):
+                    failures.append(f"{name}@{radius_km:g}km {category}: count {result.count} != {len(expected)}")
+                elif np.abs(top - expected[:TOP_K]).max(initial=0) > DISTANCE_TOLERANCE_KM:
+                    failures.append(f"{name}@{radius_km:g}km {category}: top-{TOP_K} distances differ")
+    return {"checked": checked, "failures": failures}
+
+
+def compare(current, baseline):
+    # 🔹 مقارنة بنتيجة سابقة (commit آخر) وإظهار أي تراجع في الزمن
+    regressions = []
+
+    def walk(path, new, old):
+        if isinstance(new, dict) and isinstance(old, dict):
+            for key in new:
+                if key in old:
+                    walk(f"{path}.{key}" if path else key, new[key], old[key])
+        elif isinstance(new, float) and isinstance(old, float) and path.endswith(("_s", "_ms")) and old > 0:
+            ratio = new / old
+            marker = "  <-- slower" if ratio > REGRESSION_RATIO else ""
+            print(f"{path:<60}{old:>12.3f}{new:>12.3f}{ratio:>8.2f}x{marker}")
+            if marker:
+                regressions.append(path)
+
+    print(f"{'metric':<60}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    walk("", current, baseline)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check the proximity pipeline on the Riyadh datasets")
+    parser.add_argument("--source", default=os.path.join(ROOT, poi_store.SERVICES_FILE))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=5.0, help="radius for the per-category timings")
+    parser.add_argument("--out", default=None, help="JSON output, default benchmarks/results/pipeline-<commit>.json")
+    parser.add_argument("--baseline", default=None, help="earlier JSON output to compare against")
+    parser.add_argument("--skip-correctness", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    load = bench_load(args.source, max(1, args.repeat // 2))
+    store = poi_store.get_store(args.source)
+    get_store_index(store)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "load": load,
+        "per_category_ms": bench_categories(store, FIXED_POINTS["olaya"], args.radius, args.repeat),
+        "all_categories": bench_points(store, args.repeat),
+    }
+    if not args.skip_correctness:
+        report["correctness"] = check_correctness(store)
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"pipeline-{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+    print(f"excel parse {load['excel_parse_s']:.2f}s ({load['excel_parse_peak_mb']:.0f} MB peak), "
+          f"cached load {load['cached_load_s'] * 1000:.0f}ms, index build {load['index_build_s'] * 1000:.0f}ms")
+    for key, timing in report["all_categories"].items():
+        print(f"{key:<30} cold {timing['cold_ms']:8.2f} ms   warm {timing['warm_ms']:8.2f} ms")
+    print(f"peak RSS {report['peak_rss_mb']:.0f} MB -> {out}")
+
+    failed = False
+    if "correctness" in report:
+        correctness = report["correctness"]
+        print(f"correctness: {correctness['checked'] - len(correctness['failures'])}/{correctness['checked']} match geodesic")
+        for failure in correctness["failures"]:
+            print(f"  {failure}")
+        failed = bool(correctness["failures"])
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            failed = bool(compare(report, json.load(fh))) or failed
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
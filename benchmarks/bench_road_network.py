@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import road_network  # noqa: E402
+from geo import haversine_km  # noqa: E402
+from poi_store import get_store  # noqa: E402
+
+# 🔹 زمن استعلام "ما يمكن الوصول له خلال N دقيقة" على شبكة المدينة كاملة (أو شبكة صناعية بحجم مشابه)
+RIYADH_BOUNDS = (24.45, 46.45, 24.95, 46.95)
+ARTERIAL_EVERY = 8
+
+
+def synthetic_city(size, seed=0):
+    # 🔹 شبكة شوارع منتظمة: شرايين سريعة كل عدة شوارع، وبعض الشوارع مقطوعة أو باتجاه واحد
+    rng = np.random.default_rng(seed)
+    south, west, north, east = RIYADH_BOUNDS
+    rows, cols = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    lat = south + (north - south) * rows.ravel() / (size - 1)
+    lon = west + (east - west) * cols.ravel() / (size - 1)
+    ids = np.arange(size * size).reshape(size, size)
+
+    sources, targets, speeds = [], [], []
+    for a, b, line in (
+        (ids[:, :-1].ravel(), ids[:, 1:].ravel(), rows[:, :-1].ravel()),
+        (ids[:-1, :].ravel(), ids[1:, :].ravel(), cols[:-1, :].ravel()),
+    ):
+        arterial = line % ARTERIAL_EVERY == 0
+        keep = arterial | (rng.random(len(a)) > 0.1)
+        a, b, arterial = a[keep], b[keep], arterial[keep]
+        speed = np.where(arterial, 70.0, 35.0)
+        oneway = ~arterial & (rng.random(len(a)) < 0.15)
+        sources += [a, b[~oneway]]
+        targets += [b, a[~oneway]]
+        speeds += [speed, speed[~oneway]]
+
+    sources, targets, speeds = np.concatenate(sources), np.concatenate(targets), np.concatenate(speeds)
+    seconds = haversine_km(lat[sources], lon[sources], lat[targets], lon[targets]) / speeds * 3600
+    return road_network.build_csr(lat, lon, sources, targets, seconds)
+
+
+def percentiles(values_ms):
+    p50, p95 = np.percentile(values_ms, [50, 95])
+    return f"p50 {p50:8.2f} ms  p95 {p95:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark isochrone queries on the road network")
+    parser.add_argument("--network", default=os.path.join(ROOT, road_network.ROAD_NETWORK_FILE))
+    parser.add_argument("--synthetic-size", type=int, default=400, help="grid side when no network file exists")
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--minutes", default="5,10,20")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    path = args.network
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        network = synthetic_city(args.synthetic_size)
+        path = os.path.join(tempfile.mkdtemp(), "synthetic_roads.npz")
+        road_network.save_network(network, path)
+        print(f"no road network file, using a synthetic {args.synthetic_size}x{args.synthetic_size} grid "
+              f"built in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    network = road_network.load_network(path)
+    road_network._graph_and_tree(network)
+    print(f"{network.node_count} nodes, {network.edge_count} edges loaded in {time.perf_counter() - start:.2f}s")
+
+    store = get_store()
+    start = time.perf_counter()
+    road_network.poi_snaps(network, store)
+    print(f"snapped {len(store.frame)} POIs in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = np.random.default_rng(1)
+    south, west, north, east = RIYADH_BOUNDS
+    points = np.column_stack((rng.uniform(south + 0.1, north - 0.1, args.queries), rng.uniform(west + 0.1, east - 0.1, args.queries)))
+
+    for minutes in (float(m) for m in args.minutes.split(",")):
+        road_network.reach_cache.invalidate()
+        timings = {"cold": [], "warm": []}
+        reached = []
+        for phase in ("cold", "warm"):
+            for lat, lon in points:
+                start = time.perf_counter()
+                results = road_network.reachable_categories(network, store, store.categories, (lat, lon), minutes)
+                timings[phase].append((time.perf_counter() - start) * 1000)
+                if phase == "cold":
+                    reached.append(sum(result.count for result in results.values()))
+        print(f"{minutes:>4g} min  cold {percentiles(timings['cold'])}   warm {percentiles(timings['warm'])}   "
+              f"~{int(np.mean(reached))} POIs reachable")
+
+
+if __name__ == "__main__":
+    main()
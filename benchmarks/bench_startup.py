@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 🔹 زمن أول صفحة لعملية جديدة: بدون ملفات جاهزة (قراءة الإكسل وبناء الفهرس) ومع الملفات الجاهزة
+FIRST_RENDER = """
+import json
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=600).run()
+assert not at.exception, at.exception
+import startup
+print(json.dumps(startup.startup_report()))
+"""
+
+
+def run_child(cache_dir):
+    env = dict(os.environ, NITAQ_CACHE_DIR=cache_dir)
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(name, reports):
+    first_render = np.median([report["first_render_s"] for report in reports])
+    ready = np.median([report["ready_after_s"] for report in reports])
+    steps = {step: np.median([report["steps_ms"][step] for report in reports]) for step in reports[0]["steps_ms"]}
+    print(f"{name:<14} first render {first_render:6.2f}s   data ready {ready:6.2f}s   "
+          + "  ".join(f"{step} {ms:.0f}ms" for step, ms in steps.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-first-render of a fresh app process")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = []
+        for _ in range(args.runs):
+            for name in os.listdir(cache_dir):
+                path = os.path.join(cache_dir, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+            cold.append(run_child(cache_dir))
+        summarize("no artifacts", cold)
+
+        subprocess.run(
+            [sys.executable, "startup.py", "build", "--skip-density"],
+            cwd=ROOT, env=dict(os.environ, NITAQ_CACHE_DIR=cache_dir), capture_output=True, check=True,
+        )
+        summarize("prebuilt", [run_child(cache_dir) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# 🔹 اختبار حمل للواجهة البرمجية (api.py): عدة اتصالات متزامنة، وقياس الطلبات/ثانية والكمون
+RIYADH_BOUNDS = (24.55, 46.55, 24.90, 46.85)
+
+
+def random_point(rng):
+    south, west, north, east = RIYADH_BOUNDS
+    return [round(rng.uniform(south, north), 6), round(rng.uniform(west, east), 6)]
+
+
+def build_request(host, path, rng, args):
+    categories = args.categories.split(",") if args.categories else None
+    if args.batch > 1:
+        payload = {"points": [random_point(rng) for _ in range(args.batch)], "radius_km": args.radius, "top": args.top}
+        if categories:
+            payload["categories"] = categories
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    lat, lon = random_point(rng)
+    query = f"lat={lat}&lon={lon}&radius_km={args.radius}&top={args.top}"
+    if categories:
+        query += "&categories=" + ",".join(categories)
+    return f"GET {path}?{query} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1")
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(url, args, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        while time.perf_counter() < deadline:
+            request = build_request(url.netloc, url.path or "/nearby", rng, args)
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        worker(url, args, deadline, latencies, errors, seed) for seed in range(args.concurrency)
+    ))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the HTTP/JSON nearby endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/nearby")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--batch", type=int, default=1, help="points per request (>1 uses POST)")
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--categories", default="", help="comma separated, default all")
+    args = parser.parse_args()
+
+    latencies, errors, elapsed = asyncio.run(run(args))
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0, 0, 0)
+
+    print(f"requests:   {len(latencies)} in {elapsed:.1f}s ({len(errors)} errors)")
+    print(f"throughput: {len(latencies) / elapsed:.0f} req/s, {len(latencies) * args.batch / elapsed:.0f} points/s")
+    print(f"latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {latencies_ms.max(initial=0):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+from dataclasses import dataclass
+
+
+# 🔹 سجل التصنيفات: كل تصنيف جديد يحتاج إدخال واحد هنا فقط
+@dataclass(frozen=True)
+class CategorySpec:
+    key: str
+    label: str
+    icon: str
+    image: str
+    count_title: str
+    closest_title: str
+    expander_label: str
+    empty_message: str
+    one_message: str
+    many_message: str
+    color: str = "#3388ff"
+
+
+CATEGORIES = [
+    CategorySpec(
+        key="pharmacies",
+        label="الصيدليات",
+        icon="🏥",
+        image="Pharmacy.webp",
+        color="#2e7d32",
+        count_title="### 🏥 عدد الصيدليات داخل {radius_km} كم: **{count}**",
+        closest_title="### 🏥 أقرب 3 صيدليات إليك:",
+        expander_label="🔍 عرض جميع الصيدليات",
+        empty_message="""
+🚨 **لا توجد أي صيدليات داخل هذا النطاق!**  
+💀 **إذا مفاصلك تعبانة أو تحتاج دواء يومي، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+فجأة يهجم عليك صداع، تدور بانادول… وما تلاقي إلا مشوار طويل بانتظارك! 🚗  
+**تبي مغامرة يومية للبحث عن صيدلية؟ ولا تبي صيدلية جنب البقالة؟ القرار لك!** 🔥
+""",
+        one_message="""
+⚠️ **عدد الصيدليات في هذا النطاق: 1 فقط!**  
+📍 **الصيدلية الوحيدة هنا هي:** `{name}` وتبعد عنك **{distance} كم!**  
+💊 **إذا كنت شخص يعتمد على الأدوية اليومية أو عندك إصابات متكررة، فكر مرتين قبل تسكن هنا، لأن الصيدلية الوحيدة ممكن تكون مغلقة وقت الحاجة!** 😬
+""",
+        many_message="""
+📊 **عدد الصيدليات داخل {radius_km} كم: {count} 💊**  
+👏 **تقدر تطمن!** لو احتجت بانادول في نص الليل، فيه خيارات متاحة لك 😉  
+📍 **عندك عدة صيدليات حولك، وما يحتاج تطق مشوار طويل عشان تجيب دواء بسيط!** 🚗💨
+""",
+    ),
+    CategorySpec(
+        key="metro",
+        label="محطات المترو",
+        icon="🚉",
+        image="Metro.webp",
+        color="#1565c0",
+        count_title="### 🚉 عدد محطات المترو داخل {radius_km} كم: **{count}**",
+        closest_title="### 🚉 أقرب 3 محطات مترو إليك:",
+        expander_label="🔍 عرض جميع محطات المترو",
+        empty_message="""
+🚨 **لا توجد أي محطات مترو داخل هذا النطاق!**  
+💀 **إذا كنت تعتمد على المترو يوميًا، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+فجأة تحتاج مشوار سريع، وتكتشف أنك عالق في الزحمة 🚗🚦  
+**تبي تعيش بدون مترو؟ ولا تبي محطة جنب بيتك؟ القرار لك!** 🔥
+""",
+        one_message="""
+⚠️ **عدد محطات المترو في هذا النطاق: 1 فقط!**  
+📍 **المحطة الوحيدة هنا هي:** `{name}` وتبعد عنك **{distance} كم!**  
+🚆 **إذا كنت تعتمد على المترو يوميًا، فكر مرتين قبل تسكن هنا، لأن المحطة الوحيدة قد تكون بعيدة وقت الحاجة!** 😬
+""",
+        many_message="""
+📊 **عدد محطات المترو داخل {radius_km} كم: {count} 🚆**  
+👏 **تقدر تطمن!** لو احتجت المترو في أي وقت، عندك خيارات متاحة لك 😉  
+📍 **عندك عدة محطات مترو حولك، وما تحتاج تفكر في الزحمة!** 🚄💨
+""",
+    ),
+    CategorySpec(
+        key="gyms",
+        label="الصالات الرياضية",
+        icon="🏋️‍♂️",
+        image="GYM.webp",
+        color="#6a1b9a",
+        count_title="### 🏋️‍♂️ عدد الأندية الرياضية داخل {radius_km} كم: **{count}**",
+        closest_title="### 🏋️‍♂️ أقرب 3 أندية رياضية إليك:",
+        expander_label="🔍 عرض جميع الأندية",
+        empty_message="""
+🚨 **لا توجد أي أندية رياضية داخل هذا النطاق!**  
+💀 **إذا كنت ناوي تصير فتنس مود، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+بتضطر تتمرن في البيت مع فيديوهات يوتيوب، لأن النادي بعيد جدًا! 🚶‍♂️💨  
+**تبي نادي قريب، ولا تكتفي بتمارين الضغط في الصالة؟ القرار لك!** 🔥
+""",
+        one_message="""
+⚠️ **عدد الأندية الرياضية في هذا النطاق: 1 فقط!**  
+📍 **النادي الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🏋️‍♂️ *يعني لو كان زحمة، ما عندك خيارات ثانية! لازم تستحمل الانتظار على الأجهزة الرياضية!* 😬  
+**هل أنت مستعد لهذا التحدي؟**
+""",
+        many_message="""
+📊 **عدد الأندية الرياضية داخل {radius_km} كم: {count} 🏋️‍♂️**  
+👏 *هنيالك! عندك أكثر من خيار، وتقدر تختار النادي اللي يناسبك بدون عناء!* 😉  
+📍 *ما يحتاج تتمرن في البيت، عندك أندية قريبة توفر لك كل شيء تحتاجه!* 💪🔥
+""",
+    ),
+    CategorySpec(
+        key="hospitals_clinics",
+        label="المستشفيات والعيادات",
+        icon="🏥",
+        image="Hospital.webp",
+        color="#c62828",
+        count_title="### 🏥 عدد المستشفيات داخل {radius_km} كم: **{count}**",
+        closest_title="### 🏥 أقرب 3 مستشفيات إليك:",
+        expander_label="🔍 عرض جميع المستشفيات",
+        empty_message="""
+🚨 **لا توجد أي مستشفيات داخل هذا النطاق!**  
+💀 **إذا كنت كثير الإصابات أو لديك مراجعات طبية متكررة، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+🚑 **ما فيه مستشفى قريب؟ يعني لو صادك مغص نص الليل، بتصير عندك مغامرة إسعافية مشوّقة!**  
+**هل تحب تعيش بعيدًا عن المستشفيات، أم تفضل أن تكون قريبًا من الرعاية الصحية؟ القرار لك!** 🔥
+""",
+        one_message="""
+⚠️ **عدد المستشفيات في هذا النطاق: 1 فقط!**  
+📍 **المستشفى الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🏥 **إذا كنت تحتاج إلى مستشفى قريب، هذا هو خيارك الوحيد! هل أنت مستعد لهذا التحدي؟** 🤔
+""",
+        many_message="""
+📊 **عدد المستشفيات داخل {radius_km} كم: {count} 🏥🚑**  
+👏 **إذا صار شيء، عندك خيارات كثيرة، وما تحتاج تسوي رحلة عبر القارات عشان توصل للطوارئ!** 😅  
+📍 **المستشفيات قريبة منك، وصحتك في أمان!** 💉💊
+""",
+    ),
+    CategorySpec(
+        key="malls",
+        label="المولات",
+        icon="🛍️",
+        image="Mall.webp",
+        color="#ef6c00",
+        count_title="### 🛍️ عدد المولات داخل {radius_km} كم: **{count}**",
+        closest_title="### 🛒 أقرب 3 مولات إليك:",
+        expander_label="🔍 عرض جميع المولات",
+        empty_message="""
+🚨 **لا توجد أي مولات داخل هذا النطاق!**  
+💀 **إذا كنت من محبي التسوق، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**ما فيه مول قريب؟ يعني لا مقاهي، لا براندات، لا تخفيضات فجائية؟ بتعيش حياة صعبة!** 🥲
+""",
+        one_message="""
+⚠️ **عدد المولات في هذا النطاق: 1 فقط!**  
+📍 **المول الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🛍️ **يعني لو كنت تدور على تنوع في المحلات، لا تتحمس… هذا هو خيارك الوحيد!** 😬  
+""",
+        many_message="""
+📊 **عدد المولات داخل {radius_km} كم: {count} 🛍️✨**  
+👏 **هنيالك!** إذا طفشت، عندك خيارات كثيرة للشوبينغ، ما يحتاج تسافر بعيد عشان تشتري جزمة جديدة! 😉  
+📍 **يعني بكل بساطة، خذ راحتك، وجرب أكثر من مول حسب مزاجك!** 💃🕺
+""",
+    ),
+    CategorySpec(
+        key="groceries",
+        label="البقالات",
+        icon="🛒",
+        image="supermarket.webp",
+        color="#558b2f",
+        count_title="### 🛒 عدد محلات البقالة داخل {radius_km} كم: **{count}**",
+        closest_title="### 🛒 أقرب 3 محلات بقالة إليك:",
+        expander_label="🔍 عرض جميع محلات البقالة",
+        empty_message="""
+🚨 **لا توجد أي محلات بقالة أو سوبرماركت داخل هذا النطاق!**  
+💀 **إذا كنت من النوع اللي يشتري أكل بيومه، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**يعني إذا خلصت البيض فجأة؟ لازم مشوار عشان تجيب كرتون جديد!** 🥚🚗
+""",
+        one_message="""
+⚠️ **عدد محلات البقالة في هذا النطاق: 1 فقط!**  
+📍 **المحل الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🛒 **يعني إذا كان زحمة، أو سكّر بدري، فأنت في ورطة! جهّز نفسك لطلب التوصيل أو خزن الأكل مسبقًا!** 😬  
+""",
+        many_message="""
+📊 **عدد محلات البقالة داخل {radius_km} كم: {count} 🛒🥦**  
+👏 **ما يحتاج تشيل هم الأكل، عندك محلات كثيرة تقدر تشتري منها أي وقت!** 😉  
+📍 **لو نسيت تشتري خبز، ما يحتاج مشوار طويل، أقرب بقالة عندك!** 🍞🥛
+""",
+    ),
+    CategorySpec(
+        key="entertainment",
+        label="الترفيه",
+        icon="🎭",
+        image="Event.webp",
+        color="#ad1457",
+        count_title="### 🎭 عدد أماكن الترفيه داخل {radius_km} كم: **{count}**",
+        closest_title="### 🎭 أقرب 3 أماكن ترفيه إليك:",
+        expander_label="🔍 عرض جميع أماكن الترفيه",
+        empty_message="""
+🚨 **لا توجد أي أماكن ترفيه داخل هذا النطاق!**  
+💀 **إذا كنت تحب الطلعات والأماكن الحماسية، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**يعني لا سينما، لا ملاهي، لا جلسات حلوة؟! الحياة بتكون مملة جدًا! 😭**
+""",
+        one_message="""
+⚠️ **عدد أماكن الترفيه في هذا النطاق: 1 فقط!**  
+📍 **المكان الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🎢 **يعني لو طفشت، عندك خيار واحد فقط! تحب تكرر نفس المشوار؟ ولا تفضل يكون عندك تنوع؟** 🤔
+""",
+        many_message="""
+📊 **عدد أماكن الترفيه داخل {radius_km} كم: {count} 🎢🎭**  
+👏 **يا حظك! عندك أماكن كثيرة للترفيه، يعني ما فيه ملل أبد!** 😍  
+📍 **إذا كنت تحب السينما، الألعاب، أو الجلسات الممتعة، تقدر تخطط لطلعات بدون تفكير!** 🍿🎮
+""",
+    ),
+    CategorySpec(
+        key="cafes_bakeries",
+        label="المقاهي والمخابز",
+        icon="☕",
+        image="Cafe.webp",
+        color="#6d4c41",
+        count_title="### ☕ عدد المقاهي والمخابز داخل {radius_km} كم: **{count}**",
+        closest_title="### 🍩 أقرب 3 مقاهي ومخابز إليك:",
+        expander_label="🔍 عرض جميع المقاهي والمخابز",
+        empty_message="""
+🚨 **لا توجد أي مقاهي أو مخابز داخل هذا النطاق!**  
+💀 **إذا كنت من مدمني القهوة أو عاشق الدونات، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**يعني لا كابتشينو صباحي؟ لا كرواسون طازج؟ بتعيش حياة جافة جدًا! 😭☕🥐**
+""",
+        one_message="""
+⚠️ **عدد المقاهي والمخابز في هذا النطاق: 1 فقط!**  
+📍 **المكان الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+☕ **يعني لو طفشت من نفس المقهى، ما عندك غيره! تحب تكرر نفس القهوة كل يوم؟ ولا تفضّل تنوع؟** 🤔
+""",
+        many_message="""
+📊 **عدد المقاهي والمخابز داخل {radius_km} كم: {count} ☕🍩**  
+👏 **أنت في نعيم! عندك مقاهي ومخابز كثيرة، يعني صباحاتك بتكون مثالية وكل يوم تجرب شيء جديد!** 😍  
+📍 **سواء تحب اللاتيه، الإسبريسو، أو الدونات، الخيارات عندك كثيرة!** 🥐☕
+""",
+    ),
+    CategorySpec(
+        key="restaurants",
+        label="المطاعم",
+        icon="🍽️",
+        image="restaurant.webp",
+        color="#f9a825",
+        count_title="### 🍽️ عدد المطاعم داخل {radius_km} كم: **{count}**",
+        closest_title="### 🍔 أقرب 3 مطاعم إليك:",
+        expander_label="🔍 عرض جميع المطاعم",
+        empty_message="""
+🚨 **لا توجد أي مطاعم داخل هذا النطاق!**  
+💀 **إذا كنت تعتمد على المطاعم وما تطبخ، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**يعني لا برجر، لا بيتزا، لا شاورما؟ بتعيش على النودلز والبيض المقلي؟ 🥲🍳**
+""",
+        one_message="""
+⚠️ **عدد المطاعم في هذا النطاق: 1 فقط!**  
+📍 **المطعم الوحيد هنا هو:** `{name}` وتبعد عنك **{distance} كم!**  
+🍽️ **يعني لو ما عجبك، مالك إلا تطبخ بنفسك! تبي تعيش على منيو محدود؟ ولا تفضل يكون عندك تنوع؟** 🤔
+""",
+        many_message="""
+📊 **عدد المطاعم داخل {radius_km} كم: {count} 🍔🍕**  
+👏 **هنيالك! عندك مطاعم كثيرة، يعني خياراتك مفتوحة سواء تبغى شاورما، سوشي، ولا مندي!** 😍  
+📍 **كل يوم تقدر تجرب مطعم جديد، وما فيه ملل أبد!** 🍛🍣
+""",
+    ),
+    CategorySpec(
+        key="bus",
+        label="محطات الباص",
+        icon="🚌",
+        image="bus.webp",
+        color="#00838f",
+        count_title="### 🚌 عدد محطات الباص داخل {radius_km} كم: **{count}**",
+        closest_title="### 🚏 أقرب 3 محطات باص إليك:",
+        expander_label="🔍 عرض جميع محطات الباص",
+        empty_message="""
+🚨 **لا توجد أي محطات باص داخل هذا النطاق!**  
+💀 **إذا كنت تعتمد على الباصات في تنقلاتك، فكر مليون مرة قبل تسكن هنا!** 😵‍💫  
+**يعني لازم تمشي مشوار محترم عشان تلقى محطة؟ بتصير خبير في المشي بالغصب! 🚶‍♂️😂**
+""",
+        one_message="""
+⚠️ **عدد محطات الباص في هذا النطاق: 1 فقط!**  
+📍 **المحطة الوحيدة هنا هي:** `{name}` وتبعد عنك **{distance} كم!**  
+🚌 *🚏 يعني لو فاتك الباص، لا تشيل هم، بعد ٦ دقايق بيجيك الثاني! بس المشكلة؟ إذا كانت المحطة بعيدة، بتتمشى مشوار محترم كل مرة! 😬 تبي تعتمد على محطة وحدة؟ ولا تفضل يكون عندك خيارات أقرب؟* 🤔
+""",
+        many_message="""
+📊 **عدد محطات الباص داخل {radius_km} كم: {count} 🚌🚏**  
+👏 **يا سلام! عندك محطات باص كثيرة، تنقلاتك صارت سهلة وما تحتاج تنتظر طويل!** 😍  
+📍 **ما تحتاج تمشي كثير، أقرب محطة جنبك، ومستعد تنطلق لمشاويرك!** 🚍💨
+""",
+    ),
+]
+
+CATEGORIES_BY_KEY = {spec.key: spec for spec in CATEGORIES}
+
+# 🔹 ترجمة التصنيفات للعربية (تُستخدم في قائمة الاختيار)
+category_translation = {spec.key: spec.label for spec in CATEGORIES}
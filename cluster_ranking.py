@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import ConvexHull, QhullError, cKDTree
+
+from categories import category_translation
+from geo import EARTH_RADIUS_KM
+from poi_store import VersionCache
+from spatial_index import chord_to_km, get_category_indexes, to_unit_xyz
+
+# 🔹 ترتيب الأحياء (Cluster_Name) حسب أوزان المستخدم لكل تصنيف
+FEATURES = ("count", "density", "rating", "nearest_p50", "nearest_p90")
+
+# 🔹 وزن كل مقياس داخل التصنيف الواحد (المسافات: الأقل أفضل)
+FEATURE_WEIGHTS = np.array([0.25, 0.30, 0.15, 0.20, 0.10])
+LOWER_IS_BETTER = np.array([False, False, False, True, True])
+
+KM_PER_DEGREE = np.radians(1) * EARTH_RADIUS_KM
+
+
+@dataclass(frozen=True)
+class ClusterTable:
+    clusters: pd.DataFrame  # Cluster, Cluster_Name, المساحة
+    categories: list
+    raw: np.ndarray  # (الأحياء، التصنيفات، المقاييس)
+    normalized: np.ndarray  # (الأحياء، التصنيفات × المقاييس)
+
+
+def _assign_clusters(store):
+    # 🔹 التصنيف معروف لمحطات الباص فقط، فكل نقطة تأخذ حي أقرب محطة مصنّفة لها
+    cluster = store.frame["Cluster"].to_numpy(dtype="float64")
+    labeled = np.flatnonzero(~np.isnan(cluster))
+    tree = cKDTree(to_unit_xyz(store.lat[labeled], store.lon[labeled]))
+    _, nearest = tree.query(to_unit_xyz(store.lat, store.lon), k=1)
+    return cluster[labeled][nearest].astype("int64"), labeled
+
+
+def _area_km2(lats, lons):
+    lat0 = np.radians(lats.mean())
+    points = np.column_stack((lons * np.cos(lat0) * KM_PER_DEGREE, lats * KM_PER_DEGREE))
+    if len(points) < 3:
+        return 1.0
+    try:
+        return max(ConvexHull(points).volume, 1.0)
+    except QhullError:
+        # 🔹 نقاط مكررة أو على خط واحد: ما لها مساحة، فنرجع الحد الأدنى
+        return 1.0
+
+
+def _min_max(values, lower_is_better):
+    # 🔹 تطبيع كل عمود بين 0 و 1 على مستوى الأحياء
+    lo, hi = values.min(axis=0), values.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    scaled = (values - lo) / span
+    return np.where(lower_is_better, 1.0 - scaled, scaled)
+
+
+def build_cluster_table(store):
+    assigned, labeled = _assign_clusters(store)
+    frame = store.frame
+    names = (
+        frame.iloc[labeled][["Cluster", "Cluster_Name"]]
+        .drop_duplicates("Cluster")
+        .astype({"Cluster": "int64"})
+        .sort_values("Cluster")
+        .reset_index(drop=True)
+    )
+    cluster_ids = names["Cluster"].to_numpy()
+
+    areas = []
+    for cluster_id in cluster_ids:
+        rows = labeled[assigned[labeled] == cluster_id]
+        areas.append(_area_km2(store.lat[rows], store.lon[rows]))
+    names["المساحة (كم²)"] = np.round(areas, 1)
+
+    rating = frame["Rating"].to_numpy(dtype="float64")
+    votes = frame["Number_of_Ratings"].fillna(0).to_numpy(dtype="float64")
+    indexes = get_category_indexes(store)
+    categories = store.categories
+
+    raw = np.zeros((len(cluster_ids), len(categories), len(FEATURES)))
+    for k, cluster_id in enumerate(cluster_ids):
+        # 🔹 نقاط العينة للمسافات: محطات الباص المصنّفة داخل الحي
+        samples = labeled[assigned[labeled] == cluster_id]
+        sample_xyz = to_unit_xyz(store.lat[samples], store.lon[samples])
+
+        for c, category in enumerate(categories):
+            start, stop = store.category_ranges[category]
+            inside = start + np.flatnonzero(assigned[start:stop] == cluster_id)
+            count = len(inside)
+
+            weights = votes[inside]
+            valid = ~np.isnan(rating[inside])
+            total = weights[valid].sum()
+            mean_rating = (rating[inside][valid] * weights[valid]).sum() / total if total else 0.0
+
+            chord, _ = indexes[category].tree.query(sample_xyz, k=1)
+            nearest = chord_to_km(chord)
+
+            raw[k, c] = (
+                count,
+                count / areas[k],
+                mean_rating,
+                np.percentile(nearest, 50),
+                np.percentile(nearest, 90),
+            )
+
+    normalized = _min_max(raw.reshape(len(cluster_ids), -1), np.tile(LOWER_IS_BETTER, len(categories)))
+    return ClusterTable(clusters=names, categories=categories, raw=raw, normalized=normalized)
+
+
+_tables = VersionCache()
+
+
+def get_cluster_table(store):
+    return _tables.get(store.version, partial(build_cluster_table, store))
+
+
+def rank_clusters(table, weights):
+    # 🔹 إعادة الترتيب = ضرب مصفوفة الأحياء في متجه الأوزان فقط
+    category_weights = np.array([float(weights.get(category, 0.0)) for category in table.categories])
+    if category_weights.sum() <= 0:
+        category_weights = np.ones(len(table.categories))
+
+    vector = np.outer(category_weights / category_weights.sum(), FEATURE_WEIGHTS).ravel()
+    scores = table.normalized @ vector
+
+    ranked = table.clusters.copy()
+    ranked["التقييم"] = np.round(scores * 100, 1)
+    for c, category in enumerate(table.categories):
+        if weights.get(category, 0) > 0:
+            label = category_translation.get(category, category)
+            ranked[f"عدد {label}"] = table.raw[:, c, 0].astype("int64")
+            ranked[f"أقرب {label} - الوسيط (كم)"] = np.round(table.raw[:, c, 3], 2)
+    return ranked.sort_values("التقييم", ascending=False).reset_index(drop=True)
@@ -0,0 +1,255 @@
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import time
+from functools import partial
+
+import numpy as np
+from PIL import Image
+from scipy import fft
+
+from amenity_grid import city_bounds
+from categories import category_translation
+from poi_store import CACHE_DIR, VersionCache, get_store
+
+# 🔹 خرائط كثافة (kernel density) لكل تصنيف، محسوبة مرة واحدة لكل نسخة من البيانات ومحفوظة كمربعات PNG
+DENSITY_DIR = os.path.join(CACHE_DIR, "density")
+TILE_PX = 256
+TILE_ZOOMS = range(10, 13)
+BANDWIDTH_KM = 0.6
+DENSITY_FORMAT = 1
+
+# 🔹 أعلى لون = هذا المئين من الكثافة (حتى لا تطغى نقطة مزدحمة وحدة على الباقي)
+SCALE_PERCENTILE = 99.5
+MIN_ALPHA = 40
+MAX_ALPHA = 200
+
+
+def mercator_px(lats, lons, zoom):
+    scale = TILE_PX * 2 ** zoom
+    x = (np.asarray(lons, dtype="float64") + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lats))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * scale
+    return x, y
+
+
+def tile_bounds(zoom, x, y):
+    # 🔹 حدود المربع (جنوب، غرب، شمال، شرق) بالدرجات
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0)
+
+
+def meters_per_px(lat, zoom):
+    return 40075016.686 * math.cos(math.radians(lat)) / (TILE_PX * 2 ** zoom)
+
+
+def _palette():
+    # 🔹 من أصفر شفاف إلى أحمر غامق، واللون 0 شفاف تمامًا
+    t = np.linspace(0.0, 1.0, 256)
+    red = np.full(256, 255.0)
+    green = 235 * (1 - t) ** 1.2
+    blue = 90 * (1 - t) ** 3
+    red[-64:] = np.linspace(255, 180, 64)
+    palette = np.column_stack((red, green, blue)).round().astype("uint8")
+    alpha = np.linspace(MIN_ALPHA, MAX_ALPHA, 256).round().astype("uint8")
+    alpha[0] = 0
+    return palette.ravel().tolist(), bytes(alpha)
+
+
+PALETTE, ALPHA = _palette()
+
+
+def gaussian_smooth(counts, sigma_px):
+    # 🔹 التفاف (convolution) بـ FFT: دالة النقل لغاوس قابلة للفصل exp(-2π²σ²f²) على كل محور
+    pad = int(math.ceil(4 * sigma_px))
+    ny, nx = counts.shape
+    shape = (ny + 2 * pad, nx + 2 * pad)
+    spectrum = fft.rfft2(counts.astype("float32"), s=shape)
+    fy = fft.fftfreq(shape[0]).astype("float32")
+    fx = fft.rfftfreq(shape[1]).astype("float32")
+    spectrum *= np.exp(-2 * (np.pi * sigma_px) ** 2 * fy ** 2)[:, None]
+    spectrum *= np.exp(-2 * (np.pi * sigma_px) ** 2 * fx ** 2)[None, :]
+    smoothed = fft.irfft2(spectrum, s=shape)[:ny, :nx]
+    return np.maximum(smoothed, 0.0)
+
+
+def raster_extent(store, bandwidth_km=BANDWIDTH_KM, zoom=TILE_ZOOMS[-1]):
+    # 🔹 حدود الخريطة بالمربعات (مع هامش 3σ) بأعلى دقة
+    lat_lo, lon_lo, lat_hi, lon_hi = city_bounds(store)
+    margin_px = 3 * bandwidth_km * 1000 / meters_per_px((lat_lo + lat_hi) / 2, zoom)
+    x, y = mercator_px([lat_hi, lat_lo], [lon_lo, lon_hi], zoom)
+
+    # 🔹 المحاذاة على حدود المربعات في أقل مستوى حتى تنقسم كل المستويات بدون كسور
+    step = TILE_PX * 2 ** (zoom - TILE_ZOOMS[0])
+    x0 = int(math.floor((x[0] - margin_px) / step)) * step
+    y0 = int(math.floor((y[0] - margin_px) / step)) * step
+    x1 = int(math.ceil((x[1] + margin_px) / step)) * step
+    y1 = int(math.ceil((y[1] + margin_px) / step)) * step
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def density_raster(lats, lons, extent, bandwidth_km=BANDWIDTH_KM, zoom=TILE_ZOOMS[-1]):
+    # 🔹 عدّ النقاط في كل بكسل (histogram2d) ثم تنعيم غاوسي، والناتج = عدد الأماكن لكل كم²
+    x0, y0, width, height = extent
+    x, y = mercator_px(lats, lons, zoom)
+    counts, _, _ = np.histogram2d(y, x, bins=(height, width), range=((y0, y0 + height), (x0, x0 + width)))
+
+    center_lat = float(np.median(lats)) if len(lats) else 0.0
+    px_km = meters_per_px(center_lat, zoom) / 1000
+    smoothed = gaussian_smooth(counts, bandwidth_km / px_km)
+    return smoothed / px_km ** 2
+
+
+def _downsample(raster):
+    height, width = raster.shape
+    return raster.reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3))
+
+
+def encode_tile(levels):
+    image = Image.frombytes("P", (levels.shape[1], levels.shape[0]), np.ascontiguousarray(levels).tobytes())
+    image.putpalette(PALETTE)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True, transparency=ALPHA)
+    return buffer.getvalue()
+
+
+def _tile_path(directory, category, zoom, x, y):
+    return os.path.join(directory, category, str(zoom), f"{x}_{y}.png")
+
+
+def _write_pyramid(raster, extent, directory, category, scale):
+    # 🔹 كل مستوى = متوسط 2×2 من المستوى الأعلى، والمربعات الفارغة لا تُحفظ
+    x0, y0, _, _ = extent
+    tiles = 0
+    for zoom in reversed(TILE_ZOOMS):
+        shift = TILE_ZOOMS[-1] - zoom
+        # 🔹 ذيل الغاوس الأقل من درجة لون وحدة يصير شفافًا، فالمربعات البعيدة عن كل الأماكن فارغة
+        levels = np.clip(np.floor(raster / scale * 255), 0, 255).astype("uint8")
+        tx0, ty0 = (x0 >> shift) // TILE_PX, (y0 >> shift) // TILE_PX
+        rows, cols = levels.shape[0] // TILE_PX, levels.shape[1] // TILE_PX
+        for row in range(rows):
+            for col in range(cols):
+                tile = levels[row * TILE_PX:(row + 1) * TILE_PX, col * TILE_PX:(col + 1) * TILE_PX]
+                if not tile.any():
+                    continue
+                path = _tile_path(directory, category, zoom, tx0 + col, ty0 + row)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as fh:
+                    fh.write(encode_tile(tile))
+                tiles += 1
+        if zoom > TILE_ZOOMS[0]:
+            raster = _downsample(raster)
+    return tiles
+
+
+def _version_dir(digest, root=DENSITY_DIR):
+    return os.path.join(root, digest[:16])
+
+
+def build_density_tiles(store, root=DENSITY_DIR, bandwidth_km=BANDWIDTH_KM, progress=None):
+    directory = _version_dir(store.digest, root)
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    extent = raster_extent(store, bandwidth_km)
+    meta = {"format": DENSITY_FORMAT, "digest": store.digest, "bandwidth_km": bandwidth_km, "categories": {}}
+    for category, (start, stop) in store.category_ranges.items():
+        started = time.perf_counter()
+        raster = density_raster(store.lat[start:stop], store.lon[start:stop], extent, bandwidth_km)
+        scale = float(np.percentile(raster[raster > 0], SCALE_PERCENTILE)) if (raster > 0).any() else 1.0
+        tiles = _write_pyramid(raster, extent, tmp_dir, category, scale)
+        meta["categories"][category] = {"max_per_km2": round(scale, 2), "tiles": tiles}
+        if progress:
+            progress(category, tiles, time.perf_counter() - started)
+
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False)
+    # 🔹 استبدال المجلد كاملًا بعد اكتمال كل المربعات، وحذف النسخ القديمة
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    for name in os.listdir(root):
+        if os.path.join(root, name) != directory:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return meta
+
+
+def load_density_meta(store, root=DENSITY_DIR):
+    path = os.path.join(_version_dir(store.digest, root), "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("format") != DENSITY_FORMAT or meta.get("digest") != store.digest:
+        return None
+    return meta
+
+
+def _load_or_build(store, root, build):
+    meta = load_density_meta(store, root)
+    if meta is None and build:
+        meta = build_density_tiles(store, root)
+    return meta
+
+
+_metas = VersionCache()
+
+
+def get_density_meta(store, root=DENSITY_DIR, build=True):
+    # 🔹 تُبنى المربعات مرة واحدة لكل نسخة من البيانات (أو مسبقًا: python density.py)
+    # 🔹 build=False: المربعات الجاهزة فقط، ويرجع None بدل البناء داخل الطلب
+    return _metas.get(store.digest, partial(_load_or_build, store, root, build))
+
+
+def read_tile(store, category, zoom, x, y, root=DENSITY_DIR):
+    # 🔹 جلب مربع محفوظ فقط بدون أي حساب، ويرجع None للمربع الفارغ (أو إذا المربعات غير مبنية)
+    meta = get_density_meta(store, root, build=False)
+    if meta is None or category not in meta["categories"] or zoom not in TILE_ZOOMS:
+        return None
+    path = _tile_path(_version_dir(store.digest, root), category, zoom, x, y)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def tiles_in_view(bounds, zoom):
+    # 🔹 مستوى المربعات الأقرب لتكبير الخريطة، وأرقام المربعات التي تغطي الحدود
+    zoom = int(min(max(round(zoom), TILE_ZOOMS[0]), TILE_ZOOMS[-1]))
+    south, west, north, east = bounds
+    x, y = mercator_px([north, south], [west, east], zoom)
+    n = 2 ** zoom
+    cols = range(max(int(x[0] // TILE_PX), 0), min(int(x[1] // TILE_PX), n - 1) + 1)
+    rows = range(max(int(y[0] // TILE_PX), 0), min(int(y[1] // TILE_PX), n - 1) + 1)
+    return [(zoom, col, row) for row in rows for col in cols]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the per-category density heatmap tiles")
+    parser.add_argument("--bandwidth-km", type=float, default=BANDWIDTH_KM)
+    parser.add_argument("--out", default=DENSITY_DIR)
+    args = parser.parse_args()
+
+    store = get_store()
+    start = time.perf_counter()
+    meta = build_density_tiles(
+        store,
+        root=args.out,
+        bandwidth_km=args.bandwidth_km,
+        progress=lambda category, tiles, seconds: print(
+            f"{category_translation.get(category, category)}: {tiles} tiles in {seconds:.2f}s", flush=True
+        ),
+    )
+    tiles = sum(entry["tiles"] for entry in meta["categories"].values())
+    print(f"{tiles} tiles for {len(meta['categories'])} categories in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from geo import haversine_km
+from spatial_index import SPHERE_MARGIN, get_category_indexes
+
+# 🔹 خطة مشاوير: مكان واحد من كل تصنيف مختار بأقصر جولة ذهاب وعودة من البيت
+CANDIDATES_PER_CATEGORY = 8
+TIME_BUDGET_S = 0.25
+
+
+@dataclass(frozen=True)
+class ErrandPlan:
+    categories: list  # تصنيف كل محطة بترتيب الجولة
+    positions: np.ndarray  # رقم الصف لكل محطة بترتيب الجولة
+    legs_km: np.ndarray  # البيت ← الأولى ← ... ← الأخيرة ← البيت
+    method: str  # "exact" أو "greedy" إذا انتهى الوقت
+    complete: bool  # المرشحين يشملون كل مكان ممكن يدخل في أفضل جولة
+    elapsed_ms: float
+
+    @property
+    def total_km(self):
+        return float(self.legs_km.sum())
+
+
+def _distance_matrix(lats, lons):
+    # 🔹 مسافة كروية بين كل زوجين (الفرق عن الإهليلج أقل من 0.5% ولا يغيّر الترتيب عمليًا)
+    return haversine_km(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+
+
+def _best_for_order(dist, groups, group_order):
+    # 🔹 لترتيب تصنيفات ثابت: أفضل مكان من كل تصنيف (برمجة ديناميكية على التسلسل، O(m·k²))
+    cost = dist[0, groups[group_order[0]]]
+    parents = []
+    for previous, g in zip(group_order[:-1], group_order[1:]):
+        arrive = cost[:, None] + dist[np.ix_(groups[previous], groups[g])]
+        parents.append(arrive.argmin(axis=0))
+        cost = arrive.min(axis=0)
+
+    choice = int(np.argmin(cost + dist[groups[group_order[-1]], 0]))
+    order = [int(groups[group_order[-1]][choice])]
+    for g, parent in zip(reversed(group_order[:-1]), reversed(parents)):
+        choice = int(parent[choice])
+        order.append(int(groups[g][choice]))
+    return order[::-1]
+
+
+def _greedy(dist, groups):
+    # 🔹 ترتيب التصنيفات بأقرب مرشح لم يُزر بعد بداية من البيت (العقدة 0)، ثم أفضل مكان لهذا الترتيب
+    group_order, current, remaining = [], 0, set(range(len(groups)))
+    while remaining:
+        _, g, node = min((dist[current, node], g, node) for g in remaining for node in groups[g])
+        group_order.append(g)
+        remaining.discard(g)
+        current = node
+    return _best_for_order(dist, groups, group_order)
+
+
+def _tour_km(dist, order):
+    path = [0, *order, 0]
+    return float(sum(dist[a, b] for a, b in zip(path[:-1], path[1:])))
+
+
+def _held_karp(dist, groups, deadline):
+    # 🔹 برمجة ديناميكية على المجموعات: cost[mask, j] = أقصر مسار من البيت يزور مجموعات mask وينتهي في j
+    m, n = len(groups), dist.shape[0]
+    group_of = np.full(n, -1)
+    for g, nodes in enumerate(groups):
+        group_of[nodes] = g
+
+    cost = np.full((1 << m, n), np.inf)
+    parent = np.full((1 << m, n), -1, dtype="int32")
+    for g, nodes in enumerate(groups):
+        cost[1 << g, nodes] = dist[0, nodes]
+
+    for mask in range(1, 1 << m):
+        if time.perf_counter() > deadline:
+            return None
+        ends = np.flatnonzero(np.isfinite(cost[mask]))
+        if not len(ends):
+            continue
+        # 🔹 أفضل وصول لكل عقدة من أي نهاية حالية، ثم توزيعه على المجموعات غير المزارة
+        arrive = cost[mask, ends][:, None] + dist[ends]
+        best_from = arrive.argmin(axis=0)
+        best = arrive[best_from, np.arange(n)]
+        for g, nodes in enumerate(groups):
+            if mask & (1 << g):
+                continue
+            target = mask | (1 << g)
+            better = best[nodes] < cost[target, nodes]
+            cost[target, nodes[better]] = best[nodes][better]
+            parent[target, nodes[better]] = ends[best_from[nodes][better]]
+
+    full = (1 << m) - 1
+    total = cost[full] + dist[:, 0]
+    node = int(np.argmin(total))
+    order, mask = [], full
+    while node > 0:
+        order.append(node)
+        node, mask = int(parent[mask, node]), mask & ~(1 << group_of[node])
+    return order[::-1]
+
+
+def plan_errands(store, categories, location, candidates=CANDIDATES_PER_CATEGORY, time_budget_s=TIME_BUDGET_S):
+    started = time.perf_counter()
+    indexes = get_category_indexes(store)
+    categories = [c for c in categories if c in indexes and len(indexes[c])]
+    if not categories:
+        return None
+
+    # 🔹 أقرب k لكل تصنيف من الفهرس (المرشحين فقط يدخلون الحل)
+    found = [indexes[category].nearest(location, k=candidates) for category in categories]
+    positions = np.concatenate([p for p, _ in found])
+    lats = np.concatenate(([location[0]], store.lat[positions]))
+    lons = np.concatenate(([location[1]], store.lon[positions]))
+    dist = _distance_matrix(lats, lons)
+
+    groups, start = [], 1
+    for p, _ in found:
+        groups.append(np.arange(start, start + len(p)))
+        start += len(p)
+
+    order = _held_karp(dist, groups, started + time_budget_s)
+    method = "exact"
+    if order is None:
+        order, method = _greedy(dist, groups), "greedy"
+
+    # 🔹 أي مكان أبعد من نصف طول الجولة عن البيت مستحيل يحسّنها (الذهاب والعودة وحدها أطول)
+    half_tour = _tour_km(dist, order) / 2
+    complete = all(len(p) < candidates or distances[-1] >= half_tour * SPHERE_MARGIN for p, distances in found)
+
+    nodes = [0, *order, 0]
+    legs = np.array([dist[a, b] for a, b in zip(nodes[:-1], nodes[1:])])
+    group_index = {node: g for g, members in enumerate(groups) for node in members}
+    return ErrandPlan(
+        categories=[categories[group_index[node]] for node in order],
+        positions=positions[np.asarray(order) - 1],
+        legs_km=legs,
+        method=method,
+        complete=complete,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
@@ -0,0 +1,83 @@
+import numpy as np
+
+# 🔹 حساب المسافات دفعة وحدة بدل geodesic لكل صف
+DISTANCE_COLUMN = "المسافة (كم)"
+
+EARTH_RADIUS_KM = 6371.0088
+
+# 🔹 ثوابت الإهليلج WGS-84 (نفس المستخدم في geopy.distance.geodesic)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+DISTANCE_MODES = ("haversine", "vincenty")
+DEFAULT_MODE = "vincenty"
+
+
+def haversine_km(lat0, lon0, lats, lons):
+    # 🔹 مسافة كروية سريعة، الخطأ أقل من 0.5% مقارنة بالإهليلج
+    lat0 = np.radians(lat0)
+    lon0 = np.radians(lon0)
+    lats = np.radians(np.asarray(lats, dtype="float64"))
+    lons = np.radians(np.asarray(lons, dtype="float64"))
+
+    dlat = lats - lat0
+    dlon = lons - lon0
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat0) * np.cos(lats) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def vincenty_km(lat0, lon0, lats, lons, max_iter=200, tol=1e-12):
+    # 🔹 صيغة فينسنتي العكسية على مصفوفات كاملة (دقة بالمليمتر داخل المدينة)
+    lats = np.asarray(lats, dtype="float64")
+    lons = np.asarray(lons, dtype="float64")
+
+    f = WGS84_F
+    L = np.radians(lons - lon0)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat0)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lats)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            if np.all(np.abs(lam - lam_prev) < tol):
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (
+            cos_2sigma_m
+            + B / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+            )
+        )
+        meters = WGS84_B * A * (sigma - delta_sigma)
+
+    return np.where(sin_sigma == 0, 0.0, meters) / 1000.0
+
+
+def distances_km(location, lats, lons, mode=DEFAULT_MODE):
+    lat0, lon0 = location
+    if mode == "haversine":
+        return haversine_km(lat0, lon0, lats, lons)
+    if mode == "vincenty":
+        return vincenty_km(lat0, lon0, lats, lons)
+    raise ValueError(f"Unknown distance mode: {mode!r} (expected one of {DISTANCE_MODES})")
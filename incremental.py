@@ -0,0 +1,49 @@
+import numpy as np
+
+from accessibility import accessibility_profile
+from proximity import CategoryResult, query_categories
+
+# 🔹 نتائج الجلسة الحالية: المسافات محسوبة مرة وحدة لأكبر نطاق في الشريط، وتغيير النطاق مجرد بحث ثنائي
+MAX_RADIUS_KM = 15.0
+
+
+def within_radius(result, radius_km):
+    # 🔹 النتائج مرتبة حسب المسافة، فالنطاق الأصغر = أول n عنصر (عرض بدون نسخ)
+    n = int(np.searchsorted(result.distances, radius_km, side="right"))
+    return CategoryResult(result.category, result.positions[:n], result.distances[:n])
+
+
+class SessionResults:
+    def __init__(self, max_radius_km=MAX_RADIUS_KM):
+        self.max_radius_km = max_radius_km
+        self.key = None
+        self.full = {}
+        self.nearest = None
+
+    def _reset_if_moved(self, store, location):
+        # 🔹 إعادة الحساب الكاملة فقط إذا تغيّر الموقع (أو تغيّرت البيانات)
+        key = (store.version, float(location[0]), float(location[1]))
+        if key != self.key:
+            self.key = key
+            self.full = {}
+            self.nearest = None
+
+    def results(self, store, categories, location, radius_km):
+        self._reset_if_moved(store, location)
+        if radius_km > self.max_radius_km:
+            return query_categories(store, categories, location, radius_km)
+
+        # 🔹 تصنيف جديد يُحسب وحده، والتصنيف الملغى يُحذف، والباقي كما هو
+        missing = [category for category in categories if category not in self.full]
+        if missing:
+            self.full.update(query_categories(store, missing, location, self.max_radius_km))
+        for category in [category for category in self.full if category not in categories]:
+            del self.full[category]
+
+        return {category: within_radius(self.full[category], radius_km) for category in categories}
+
+    def profile(self, store, location):
+        self._reset_if_moved(store, location)
+        if self.nearest is None:
+            self.nearest = accessibility_profile(store, location)
+        return self.nearest
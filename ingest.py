@@ -0,0 +1,277 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from scipy.spatial import cKDTree
+
+from geo import EARTH_RADIUS_KM
+from poi_store import CACHE_DIR, SERVICES_FILE, SERVICES_SHEET
+from spatial_index import to_unit_xyz
+
+# 🔹 بناء ملف الأماكن المدمج من ملفات التصنيفات مع حذف المكرر، وإعادة معالجة الملفات المتغيّرة فقط
+SOURCES = {
+    "pharmacies.xlsx": "pharmacies",
+    "malls.xlsx": "malls",
+    "entertainment.xlsx": "entertainment",
+    "hospitals_clinics.xlsx": "hospitals_clinics",
+    "gyms.xlsx": "gyms",
+    "groceries_supermarket.xlsx": "groceries",
+    "bus_stops.xlsx": "bus",
+    "metro_stations.xlsx": "metro",
+    "cafes_bakeries.xlsx": "cafes_bakeries",
+    "restaurants.xlsx": "restaurants",
+}
+COLUMNS = ["Name", "Type_of_Utility", "Number_of_Ratings", "Rating", "Longitude", "Latitude", "Standardized_Name"]
+
+# 🔹 أعمدة يدوية في الملف المدمج الحالي (تصنيف الأحياء) تُنقل للناتج الجديد
+CARRY_OVER_COLUMNS = ["Cluster", "Cluster_Name"]
+
+INGEST_DIR = os.path.join(CACHE_DIR, "ingest")
+MANIFEST_FILE = os.path.join(INGEST_DIR, "manifest.json")
+OUTPUT_FILE = "merged_places.parquet"
+PIPELINE_VERSION = 1
+
+DEDUP_RADIUS_M = 50
+NAME_SIMILARITY = 0.9
+WORD_SIMILARITY = 0.8
+
+ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي"})
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_name(name):
+    # 🔹 للمقارنة فقط: حذف التشكيل والتطويل، توحيد الألف والياء والتاء المربوطة، والحروف الصغيرة
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKC", name)
+    name = ARABIC_DIACRITICS.sub("", name).translate(ARABIC_LETTERS).translate(ARABIC_DIGITS)
+    return NON_WORD.sub(" ", name.casefold()).strip()
+
+
+def _distinguishing_tokens(name):
+    # 🔹 أرقام الفروع والخطوط والحروف المفردة (مثل 301 / 401 أو A / B) لازم تتطابق حتى لو الاسم متشابه
+    return frozenset(token for token in name.split() if len(token) == 1 or any(c.isdigit() for c in token))
+
+
+def same_place(a, b, similarity=NAME_SIMILARITY):
+    # 🔹 مقارنة محافظة: نفس عدد الكلمات، وكل كلمة مختلفة مجرد خطأ إملائي (مثل "ودر" و "ورد")
+    if a == b:
+        return True
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b) or _distinguishing_tokens(a) != _distinguishing_tokens(b):
+        return False
+    for x, y in zip(words_a, words_b):
+        if x != y and sorted(x) != sorted(y) and SequenceMatcher(None, x, y).ratio() < WORD_SIMILARITY:
+            return False
+    return SequenceMatcher(None, a, b).ratio() >= similarity
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def read_source(path):
+    # 🔹 قراءة متدفقة (read_only) صف بصف بدون تحميل ورقة العمل كاملة
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[workbook.sheetnames[0]].iter_rows(values_only=True)
+        header = [str(value) if value is not None else "" for value in next(rows)]
+        wanted = {column: header.index(column) for column in COLUMNS if column in header}
+        data = {column: [] for column in wanted}
+        for row in rows:
+            if row[wanted["Latitude"]] is None or row[wanted["Longitude"]] is None:
+                continue
+            for column, index in wanted.items():
+                data[column].append(row[index] if index < len(row) else None)
+    finally:
+        workbook.close()
+
+    frame = pd.DataFrame(data, dtype=object)
+    for column in COLUMNS:
+        if column not in frame.columns:
+            frame[column] = None
+    # 🔹 "string" يبقي الخلايا الفاضية NA (وليس النص "None" الذي يدخل في مقارنة الأسماء والناتج)
+    for column in ("Name", "Type_of_Utility", "Standardized_Name"):
+        frame[column] = frame[column].astype("string")
+    for column in ("Number_of_Ratings", "Rating", "Longitude", "Latitude"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    return frame[COLUMNS]
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = np.arange(size)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def deduplicate(frame, radius_m=DEDUP_RADIUS_M, similarity=NAME_SIMILARITY):
+    # 🔹 أزواج قريبة من KD-tree، ثم مقارنة الأسماء، ثم دمج المجموعات (union-find)
+    if len(frame) < 2:
+        return frame, 0
+    names = [normalize_name(name) for name in frame["Name"]]
+    tree = cKDTree(to_unit_xyz(frame["Latitude"].to_numpy(), frame["Longitude"].to_numpy()))
+    chord = 2 * np.sin(radius_m / 1000 / EARTH_RADIUS_KM / 2)
+    pairs = tree.query_pairs(chord, output_type="ndarray")
+
+    groups = _UnionFind(len(frame))
+    for a, b in pairs:
+        if same_place(names[a], names[b], similarity):
+            groups.union(a, b)
+
+    roots = np.array([groups.find(i) for i in range(len(frame))])
+    if (roots == np.arange(len(frame))).all():
+        return frame, 0
+
+    # 🔹 من كل مجموعة نبقي الصف صاحب أكثر تقييمات، بترتيب ظهور أول صف في المجموعة
+    votes = frame["Number_of_Ratings"].fillna(0).to_numpy()
+    order = np.lexsort((-votes, roots))
+    keep = order[np.r_[True, roots[order][1:] != roots[order][:-1]]]
+    merged_votes = pd.Series(votes).groupby(roots).max()
+
+    kept = frame.iloc[keep].copy()
+    kept["Number_of_Ratings"] = merged_votes.loc[roots[keep]].to_numpy()
+    kept = kept.iloc[np.argsort(roots[keep], kind="stable")]
+    return kept.reset_index(drop=True), len(frame) - len(kept)
+
+
+def _part_path(source):
+    return os.path.join(INGEST_DIR, "parts", os.path.splitext(os.path.basename(source))[0] + ".parquet")
+
+
+def _load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    return manifest if manifest.get("pipeline") == PIPELINE_VERSION else {}
+
+
+def _write_atomic(frame, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def ingest_source(source, category):
+    frame = read_source(source)
+    frame, removed = deduplicate(frame)
+    frame.insert(frame.columns.get_loc("Standardized_Name"), "Category", category)
+    return frame, removed
+
+
+def carry_over(frame, previous):
+    # 🔹 ربط بالاسم والإحداثيات (مقرّبة) مع الملف المدمج السابق لنقل الأعمدة اليدوية
+    columns = [c for c in CARRY_OVER_COLUMNS if c in previous.columns]
+    if not columns:
+        return frame
+
+    def key(df):
+        return (
+            df["Category"].astype(str) + "|" + df["Name"].astype(str) + "|"
+            + df["Latitude"].round(6).astype(str) + "|" + df["Longitude"].round(6).astype(str)
+        )
+
+    lookup = previous[columns].set_index(key(previous))
+    lookup = lookup[~lookup.index.duplicated()]
+    carried = lookup.reindex(key(frame))
+    for column in columns:
+        frame[column] = carried[column].to_numpy()
+    return frame
+
+
+def read_previous(path):
+    if not path or not os.path.exists(path):
+        return None
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_excel(path, sheet_name=SERVICES_SHEET, engine="openpyxl")
+
+
+def run(source_dir=".", output=OUTPUT_FILE, previous=SERVICES_FILE, force=False, log=print):
+    manifest = _load_manifest()
+    sources = manifest.get("sources", {})
+    parts = []
+    changed = []
+
+    for name, category in SOURCES.items():
+        path = os.path.join(source_dir, name)
+        digest = file_digest(path)
+        part_path = _part_path(name)
+        entry = sources.get(name)
+
+        if not force and entry and entry["sha256"] == digest and entry["category"] == category and os.path.exists(part_path):
+            parts.append(pd.read_parquet(part_path))
+            continue
+
+        start = time.perf_counter()
+        frame, removed = ingest_source(path, category)
+        _write_atomic(frame, part_path)
+        sources[name] = {"sha256": digest, "category": category, "rows": len(frame), "duplicates": removed}
+        changed.append(name)
+        parts.append(frame)
+        log(f"{name}: {len(frame)} rows ({removed} duplicates removed) in {time.perf_counter() - start:.1f}s")
+
+    output_digest = hashlib.sha256(
+        json.dumps([sources[name]["sha256"] for name in SOURCES]).encode("utf-8")
+    ).hexdigest()
+    if not changed and manifest.get("output") == output and manifest.get("output_digest") == output_digest and os.path.exists(output):
+        log("no source changed, output is up to date")
+        return output, []
+
+    merged = pd.concat(parts, ignore_index=True)
+    previous_frame = read_previous(previous)
+    if previous_frame is not None:
+        merged = carry_over(merged, previous_frame)
+    _write_atomic(merged, output)
+
+    os.makedirs(INGEST_DIR, exist_ok=True)
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as fh:
+        json.dump(
+            {"pipeline": PIPELINE_VERSION, "sources": sources, "output": output, "output_digest": output_digest},
+            fh,
+            ensure_ascii=False,
+            indent=2,
+        )
+    log(f"{len(merged)} rows from {len(SOURCES)} sources ({len(changed)} reprocessed) -> {output}")
+    return output, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the merged places file from the per-category sheets")
+    parser.add_argument("--source-dir", default=".")
+    parser.add_argument("--out", default=OUTPUT_FILE)
+    parser.add_argument("--previous", default=SERVICES_FILE, help="existing merged file to carry cluster labels from")
+    parser.add_argument("--force", action="store_true", help="reprocess every source")
+    args = parser.parse_args()
+    run(args.source_dir, args.out, args.previous, args.force)
+
+
+if __name__ == "__main__":
+    main()
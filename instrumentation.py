@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from poi_store import CACHE_DIR
+
+# 🔹 قياس زمن كل مرحلة (لكل إعادة تشغيل ولكل تصنيف) وتصديره كسجلات JSON أو بصيغة Prometheus
+METRIC_PREFIX = "nitaq"
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+PROFILE_INTERVAL_S = 0.005
+SLOW_TRACE_MS = float(os.environ.get("NITAQ_SLOW_MS", 1000))
+
+logger = logging.getLogger("nitaq.metrics")
+
+
+class _Stat:
+    __slots__ = ("calls", "seconds", "max_seconds", "rows")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+
+
+_lock = threading.Lock()
+_stats = {}
+_collectors = {}
+_local = threading.local()
+
+
+def add_collector(name, collect):
+    # 🔹 collect() ترجع قاموس {اسم: قيمة} يُضاف للتصدير (مثل إحصائيات الذاكرة المؤقتة)
+    _collectors[name] = collect
+
+
+def record(name, seconds, rows=None, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        stat = _stats.get(key)
+        if stat is None:
+            stat = _stats[key] = _Stat()
+        stat.calls += 1
+        stat.seconds += seconds
+        stat.max_seconds = max(stat.max_seconds, seconds)
+        if rows is not None:
+            stat.rows += rows
+
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.stages.append({"stage": name, **labels, "ms": round(seconds * 1000, 3), "rows": rows})
+
+
+class Span:
+    __slots__ = ("rows",)
+
+    def __init__(self, rows=None):
+        self.rows = rows
+
+
+@contextmanager
+def stage(name, rows=None, **labels):
+    # 🔹 with stage("query.refine", category="gyms") as span: ... ; span.rows = n
+    span = Span(rows)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        record(name, time.perf_counter() - start, span.rows, **labels)
+
+
+class Trace:
+    def __init__(self, name, **meta):
+        self.name = name
+        self.meta = meta
+        self.stages = []
+        self.started = time.perf_counter()
+        self.total_ms = None
+
+    def as_dict(self):
+        return {"event": "trace", "trace": self.name, **self.meta, "total_ms": self.total_ms, "stages": self.stages}
+
+
+def start_trace(name, **meta):
+    # 🔹 تتبّع واحد لكل خيط (Streamlit يشغّل كل جلسة في خيط مستقل)
+    _local.trace = Trace(name, **meta)
+    return _local.trace
+
+
+def finish_trace():
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return None
+    _local.trace = None
+
+    seconds = time.perf_counter() - trace.started
+    trace.total_ms = round(seconds * 1000, 3)
+    record(trace.name, seconds)
+
+    level = logging.WARNING if trace.total_ms >= SLOW_TRACE_MS else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps(trace.as_dict(), ensure_ascii=False, default=str))
+    return trace
+
+
+def snapshot():
+    with _lock:
+        return [
+            {
+                "stage": name,
+                **dict(labels),
+                "calls": stat.calls,
+                "total_ms": round(stat.seconds * 1000, 3),
+                "mean_ms": round(stat.seconds * 1000 / stat.calls, 3),
+                "max_ms": round(stat.max_seconds * 1000, 3),
+                "rows": stat.rows,
+            }
+            for (name, labels), stat in sorted(_stats.items())
+        ]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def prometheus_text():
+    # 🔹 صيغة Prometheus النصية (text exposition format 0.0.4)
+    with _lock:
+        items = [
+            (((("stage", name),) + labels), stat.calls, stat.seconds, stat.max_seconds, stat.rows)
+            for (name, labels), stat in sorted(_stats.items())
+        ]
+
+    lines = []
+    metrics = (
+        ("stage_calls_total", "counter", "Number of times a stage ran", 1),
+        ("stage_seconds_total", "counter", "Total time spent in a stage", 2),
+        ("stage_seconds_max", "gauge", "Slowest single run of a stage", 3),
+        ("stage_rows_total", "counter", "Rows produced by a stage", 4),
+    )
+    for metric, kind, help_text, column in metrics:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for item in items:
+            lines.append(f"{name}{_labels(item[0])} {item[column]:g}")
+
+    for prefix, collect in sorted(_collectors.items()):
+        for key, value in collect().items():
+            lines.append(f"{METRIC_PREFIX}_{prefix}_{key} {float(value):g}")
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    # 🔹 أخذ عينات من مكدس خيط واحد كل بضع ملّي ثواني وحفظها بصيغة folded (للـ flame graph)
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL_S):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._scope = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack, inside = [], False
+            while frame is not None:
+                inside = inside or frame is self._scope
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            # 🔹 الخيط خرج من الإطار الذي بدأ منه القياس (st.rerun أو st.stop قطع السكربت): نتوقف بدون stop()
+            if not inside:
+                break
+            self.samples[";".join(reversed(stack))] += 1
+        self._scope = None
+
+    def start(self, scope=None):
+        # 🔹 scope: الإطار الذي يجب أن يبقى في المكدس أثناء القياس، افتراضيًا إطار المستدعي (سكربت التطبيق)
+        self._scope = scope or sys._getframe(1)
+        self._thread = threading.Thread(target=self._sample, name="nitaq-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, name="rerun"):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.folded())
+        return path
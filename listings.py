@@ -0,0 +1,131 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from poi_store import CACHE_DIR
+from spatial_index import chord_to_km, get_category_indexes, km_to_chord, to_unit_xyz
+
+# 🔹 إعلانات السكن (Airbnb) مع الخدمات القريبة من كل إعلان
+LISTINGS_FILE = "Cleaned_airbnb_v1.xlsx"
+LISTING_COLUMNS = [
+    "room_id", "name", "title", "price_per_month", "rating", "review_count",
+    "latitude", "longitude", "Category", "Cluster_Name", "URL",
+]
+STANDARD_RADII_KM = (0.5, 1.0, 2.0, 5.0)
+FEATURES_FILE = os.path.join(CACHE_DIR, "listing_features.pkl")
+
+
+def count_column(category, radius_km):
+    return f"count_{category}_{radius_km:g}km"
+
+
+def nearest_column(category):
+    return f"nearest_{category}_km"
+
+
+_lock = threading.Lock()
+_listings = {}
+
+
+def load_listings(path=LISTINGS_FILE):
+    # 🔹 قراءة الملف مرة واحدة لكل عملية، وإعادة القراءة فقط إذا تغيّر
+    mtime = os.stat(path).st_mtime_ns
+    cached = _listings.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _lock:
+        frame = pd.read_excel(path, engine="openpyxl", usecols=LISTING_COLUMNS)
+        frame = frame.drop_duplicates("room_id").set_index("room_id")
+        frame["Cluster_Name"] = frame["Cluster_Name"].astype("category")
+        _listings[path] = (mtime, frame)
+        return frame
+
+
+def point_features(indexes, lats, lons, categories, radii_km=STANDARD_RADII_KM):
+    # 🔹 ربط مكاني دفعي: استعلام واحد لكل (تصنيف، نطاق) على كل النقاط معًا
+    xyz = to_unit_xyz(lats, lons)
+    columns = {}
+    for category in categories:
+        index = indexes[category]
+        for radius_km in radii_km:
+            counts = index.tree.query_ball_point(xyz, km_to_chord(radius_km), return_length=True)
+            columns[count_column(category, radius_km)] = counts.astype("int32")
+
+        chord, _ = index.tree.query(xyz, k=1)
+        columns[nearest_column(category)] = chord_to_km(chord).astype("float32")
+    return columns
+
+
+def compute_features(store, listings):
+    columns = point_features(
+        get_category_indexes(store),
+        listings["latitude"].to_numpy(),
+        listings["longitude"].to_numpy(),
+        store.categories,
+    )
+    return pd.DataFrame(columns, index=listings.index)
+
+
+def _read_features(digest):
+    if not os.path.exists(FEATURES_FILE):
+        return None
+    saved = pd.read_pickle(FEATURES_FILE)
+    if saved.attrs.get("digest") != digest:
+        return None
+    return saved
+
+
+def _write_features(features, digest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    features.attrs["digest"] = digest
+    tmp_path = FEATURES_FILE + ".tmp"
+    features.to_pickle(tmp_path)
+    os.replace(tmp_path, FEATURES_FILE)
+
+
+_features_lock = threading.Lock()
+_features = {}
+
+
+def listing_features(store, listings):
+    # 🔹 حساب تدريجي: الإعلانات الجديدة فقط تُحسب، والباقي من الذاكرة أو الملف المحفوظ
+    with _features_lock:
+        features = _features.get(store.digest)
+        if features is None:
+            features = _read_features(store.digest)
+
+        if features is None:
+            features = compute_features(store, listings)
+            _write_features(features, store.digest)
+        else:
+            new_ids = listings.index.difference(features.index)
+            if len(new_ids):
+                features = pd.concat([features, compute_features(store, listings.loc[new_ids])])
+                _write_features(features, store.digest)
+
+        _features.clear()
+        _features[store.digest] = features
+        return features.loc[listings.index]
+
+
+def search_listings(listings, features, price_range, min_rating, max_nearest_km, sort_by):
+    # 🔹 التصفية كلها أقنعة منطقية على أعمدة محسوبة مسبقًا
+    mask = listings["price_per_month"].between(*price_range).to_numpy()
+    mask = mask & (listings["rating"].fillna(0).to_numpy() >= min_rating)
+    for category, limit in max_nearest_km.items():
+        mask = mask & (features[nearest_column(category)].to_numpy() <= limit)
+
+    result = listings.loc[mask].join(features.loc[mask])
+    if sort_by == "price":
+        return result.sort_values("price_per_month")
+    if sort_by == "rating":
+        return result.sort_values(["rating", "review_count"], ascending=False)
+
+    # 🔹 الأقرب للخدمات المختارة: مجموع أقرب المسافات
+    columns = [nearest_column(category) for category in max_nearest_km]
+    if not columns:
+        return result.sort_values("price_per_month")
+    return result.assign(_total=result[columns].sum(axis=1)).sort_values("_total").drop(columns="_total")
@@ -0,0 +1,168 @@
+import base64
+import math
+from dataclasses import dataclass
+from functools import partial
+
+import folium
+import numpy as np
+from branca.element import MacroElement
+from jinja2 import Template
+
+from categories import CATEGORIES_BY_KEY
+from density import mercator_px, tile_bounds
+from geo import EARTH_RADIUS_KM
+from poi_store import VersionCache
+
+# 🔹 تجميع النقاط على الخادم لكل مستوى تكبير، وإرسال النقاط داخل حدود الخريطة فقط
+ZOOM_LEVELS = range(10, 19)
+CLUSTER_PX = 64
+MAX_MARKERS = 600
+VIEW_PADDING = 0.15
+
+
+@dataclass(frozen=True)
+class ZoomClusters:
+    lat: np.ndarray
+    lon: np.ndarray
+    count: np.ndarray
+    name: np.ndarray  # اسم المكان إذا كانت المجموعة نقطة واحدة
+
+
+def _cluster(lats, lons, names, zoom):
+    # 🔹 تجميع بشبكة بكسلات ثابتة: كل خلية تصير علامة وحدة في مركز نقاطها
+    x, y = mercator_px(lats, lons, zoom)
+    cells = (np.floor(x / CLUSTER_PX).astype("int64") << 32) + np.floor(y / CLUSTER_PX).astype("int64")
+    _, first, inverse, count = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+
+    lat = np.bincount(inverse, weights=lats) / count
+    lon = np.bincount(inverse, weights=lons) / count
+    name = np.where(count == 1, names[first], "")
+    return ZoomClusters(lat=lat, lon=lon, count=count.astype("int32"), name=name)
+
+
+def build_cluster_levels(store):
+    names = store.frame["Name"].astype(str).to_numpy()
+    levels = {}
+    for category, (start, stop) in store.category_ranges.items():
+        lats, lons = store.lat[start:stop], store.lon[start:stop]
+        for zoom in ZOOM_LEVELS:
+            levels[category, zoom] = _cluster(lats, lons, names[start:stop], zoom)
+    return levels
+
+
+_levels = VersionCache()
+
+
+def get_cluster_levels(store):
+    return _levels.get(store.version, partial(build_cluster_levels, store))
+
+
+def zoom_for_radius(radius_km):
+    # 🔹 مستوى تكبير يظهر فيه النطاق كاملًا تقريبًا
+    zoom = math.log2(EARTH_RADIUS_KM * 2 * math.pi / (radius_km * 2.5))
+    return int(min(max(round(zoom), ZOOM_LEVELS[0]), ZOOM_LEVELS[-1]))
+
+
+def bounds_around(location, radius_km):
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = dlat / math.cos(math.radians(location[0]))
+    return (location[0] - dlat, location[1] - dlon, location[0] + dlat, location[1] + dlon)
+
+
+def markers_in_view(levels, categories, bounds, zoom, max_markers=MAX_MARKERS):
+    # 🔹 ترميز مختصر لكل علامة: [خط العرض، خط الطول، العدد، رقم التصنيف، الاسم]
+    zoom = int(min(max(zoom, ZOOM_LEVELS[0]), ZOOM_LEVELS[-1]))
+    south, west, north, east = bounds
+    pad_lat = (north - south) * VIEW_PADDING
+    pad_lon = (east - west) * VIEW_PADDING
+
+    parts = []
+    for category_index, category in enumerate(categories):
+        clusters = levels.get((category, zoom))
+        if clusters is None:
+            continue
+        inside = (
+            (clusters.lat >= south - pad_lat) & (clusters.lat <= north + pad_lat)
+            & (clusters.lon >= west - pad_lon) & (clusters.lon <= east + pad_lon)
+        )
+        parts.append((
+            clusters.lat[inside],
+            clusters.lon[inside],
+            clusters.count[inside],
+            np.full(inside.sum(), category_index),
+            clusters.name[inside],
+        ))
+    if not parts:
+        return []
+
+    lat, lon, count, category_ids, name = (np.concatenate(column) for column in zip(*parts))
+
+    # 🔹 إذا زادت العلامات عن الحد نبقي الأكبر عددًا (حجم ثابت مهما كان النطاق أو التصنيفات)
+    if len(lat) > max_markers:
+        keep = np.argpartition(-count, max_markers)[:max_markers]
+        lat, lon, count, category_ids, name = lat[keep], lon[keep], count[keep], category_ids[keep], name[keep]
+
+    return [
+        [round(float(a), 5), round(float(o), 5), int(c), int(k), str(n)]
+        for a, o, c, k, n in zip(lat, lon, count, category_ids, name)
+    ]
+
+
+class CompactMarkers(MacroElement):
+    # 🔹 العلامات تُرسل كمصفوفة JSON وحدة وتُرسم في المتصفح بحلقة بسيطة
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function () {
+            var colors = {{ this.colors|tojson }};
+            var markers = {{ this.markers|tojson }};
+            for (var i = 0; i < markers.length; i++) {
+                var m = markers[i];
+                var marker = L.circleMarker([m[0], m[1]], {
+                    radius: m[2] > 1 ? Math.min(8 + 4 * Math.log10(m[2]), 22) : 5,
+                    color: colors[m[3]],
+                    fillColor: colors[m[3]],
+                    fillOpacity: 0.7,
+                    weight: 1
+                }).addTo({{ this._parent.get_name() }});
+                // أسماء الأماكن من الملفات تُعرض كنص وليس HTML
+                var label = document.createElement("span");
+                label.textContent = m[2] > 1 ? String(m[2]) : m[4];
+                marker.bindTooltip(label);
+            }
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, markers, colors):
+        super().__init__()
+        self._name = "CompactMarkers"
+        self.markers = markers
+        self.colors = colors
+
+
+def build_base_map(location, radius_km):
+    base = folium.Map(location=location, zoom_start=zoom_for_radius(radius_km))
+    folium.Marker(location, tooltip="موقعك", icon=folium.Icon(color="red", icon="home")).add_to(base)
+    folium.Circle(location, radius=radius_km * 1000, color="#d32f2f", fill=False, weight=2).add_to(base)
+    return base
+
+
+def build_marker_layer(markers, categories):
+    layer = folium.FeatureGroup(name="الخدمات")
+    colors = [CATEGORIES_BY_KEY[key].color if key in CATEGORIES_BY_KEY else "#3388ff" for key in categories]
+    CompactMarkers(markers, colors).add_to(layer)
+    return layer
+
+
+def build_density_layer(tiles):
+    # 🔹 مربعات الكثافة المحفوظة كصور فوق الخريطة (كل مربع بحدوده بالضبط)
+    layer = folium.FeatureGroup(name="الكثافة")
+    for (zoom, x, y), png in tiles:
+        if png is None:
+            continue
+        south, west, north, east = tile_bounds(zoom, x, y)
+        folium.raster_layers.ImageOverlay(
+            image="data:image/png;base64," + base64.b64encode(png).decode("ascii"),
+            bounds=[[south, west], [north, east]],
+        ).add_to(layer)
+    return layer
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+# 🔹 مخزن نقاط الخدمات المشترك بين كل الجلسات في نفس العملية
+SERVICES_FILE = os.environ.get("NITAQ_SERVICES_FILE", "merged_places.xlsx")
+SERVICES_SHEET = "Sheet1"
+CACHE_DIR = os.environ.get("NITAQ_CACHE_DIR", ".nitaq_cache")
+
+# 🔹 تمثيل مضغوط: النصوص المتكررة كأكواد (قاموس)، والأرقام الصغيرة float32، والأعمدة غير المستخدمة تُحذف
+CATEGORICAL_COLUMNS = ["Category", "Type_of_Utility", "Cluster_Name", "Standardized_Name", "Name"]
+FLOAT32_COLUMNS = ["Rating", "Number_of_Ratings", "Cluster"]
+DROP_COLUMNS = ["Unnamed: 0"]
+
+# 🔹 يتغيّر عند تغيير شكل النسخة المحوّلة حتى لا تُستخدم نسخة قديمة
+CACHE_FORMAT = 3
+
+
+# 🔹 المقارنة بالهوية حتى يمكن استخدام النسخة كمفتاح في الذاكرة المؤقتة
+@dataclass(frozen=True, eq=False)
+class PoiStore:
+    frame: pd.DataFrame
+    lat: np.ndarray
+    lon: np.ndarray
+    category_ranges: dict
+    source: str
+    signature: tuple
+    digest: str
+    version: int
+
+    @property
+    def categories(self):
+        # 🔹 التصنيفات بنفس ترتيب ظهورها في الملف
+        return list(self.category_ranges)
+
+    @property
+    def category_starts(self):
+        return np.array([start for start, _ in self.category_ranges.values()], dtype="intp")
+
+
+_lock = threading.Lock()
+_stores = {}
+_version = 0
+_reload_listeners = []
+
+
+def add_reload_listener(callback):
+    # 🔹 تُستدعى مع النسخة الجديدة كلما تغيّر محتوى الملف (لتفريغ الذاكرة المؤقتة مثلاً)
+    _reload_listeners.append(callback)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _cache_paths(path):
+    # 🔹 الاسم يشمل الامتداد حتى لا تتشارك merged_places.xlsx و merged_places.parquet نفس النسخة
+    base = os.path.basename(path)
+    return (
+        os.path.join(CACHE_DIR, f"{base}.pkl"),
+        os.path.join(CACHE_DIR, f"{base}.json"),
+    )
+
+
+def _parse_source(path, sheet_name):
+    # 🔹 قراءة ملف الإكسل مرة واحدة وتحويل الأعمدة لأنواع مضغوطة
+    # 🔹 ملف parquet من ingest.py أو ملف الإكسل الأصلي
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl")
+    frame = frame.drop(columns=[c for c in DROP_COLUMNS if c in frame.columns])
+
+    # 🔹 الإحداثيات تبقى float64: float32 يقرّب حتى 0.4 متر ويغيّر العد عند حدود النطاق
+    frame["Latitude"] = frame["Latitude"].astype("float64")
+    frame["Longitude"] = frame["Longitude"].astype("float64")
+    for column in FLOAT32_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].astype("float32")
+    for column in CATEGORICAL_COLUMNS:
+        if column in frame.columns:
+            frame[column] = pd.Categorical(frame[column], categories=frame[column].dropna().unique())
+
+    # 🔹 ترتيب الصفوف بحيث يكون كل تصنيف في نطاق متصل من الصفوف
+    return frame.sort_values("Category", kind="stable").reset_index(drop=True)
+
+
+def _load_frame(path, sheet_name, digest):
+    frame_path, meta_path = _cache_paths(path)
+
+    # 🔹 استخدام النسخة المحوّلة إذا كانت مطابقة لمحتوى الملف الأصلي
+    if os.path.exists(frame_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if (
+            meta.get("digest") == digest
+            and meta.get("sheet") == sheet_name
+            and meta.get("format") == CACHE_FORMAT
+        ):
+            return pd.read_pickle(frame_path)
+
+    frame = _parse_source(path, sheet_name)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = frame_path + ".tmp"
+    frame.to_pickle(tmp_path)
+    os.replace(tmp_path, frame_path)
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump(
+            {"digest": digest, "sheet": sheet_name, "format": CACHE_FORMAT, "rows": len(frame)},
+            fh,
+        )
+    return frame
+
+
+def _build_store(path, sheet_name, signature, digest):
+    global _version
+    frame = _load_frame(path, sheet_name, digest)
+
+    # 🔹 مصفوفات الإحداثيات عرض (view) على أعمدة الجدول نفسها بدون نسخة ثانية
+    lat = frame["Latitude"].to_numpy()
+    lon = frame["Longitude"].to_numpy()
+    lat.flags.writeable = False
+    lon.flags.writeable = False
+
+    # 🔹 نطاق الصفوف لكل تصنيف (بدون مقارنة نصية على كل الصفوف في كل استعلام)
+    counts = np.bincount(frame["Category"].cat.codes.to_numpy(), minlength=len(frame["Category"].cat.categories))
+    stops = np.cumsum(counts)
+    category_ranges = {
+        category: (int(stop - count), int(stop))
+        for category, count, stop in zip(frame["Category"].cat.categories, counts, stops)
+    }
+
+    _version += 1
+    return PoiStore(
+        frame=frame,
+        lat=lat,
+        lon=lon,
+        category_ranges=category_ranges,
+        source=path,
+        signature=signature,
+        digest=digest,
+        version=_version,
+    )
+
+
+def get_store(path=SERVICES_FILE, sheet_name=SERVICES_SHEET):
+    # 🔹 إرجاع نفس النسخة لكل الجلسات، وإعادة التحميل فقط إذا تغيّر الملف
+    signature = _file_signature(path)
+    store = _stores.get((path, sheet_name))
+    if store is not None and store.signature == signature:
+        return store
+
+    with _lock:
+        store = _stores.get((path, sheet_name))
+        if store is not None and store.signature == signature:
+            return store
+
+        digest = _file_digest(path)
+        if store is not None and store.digest == digest:
+            # 🔹 تغيّر وقت التعديل فقط والمحتوى نفسه
+            store = replace(store, signature=signature)
+            _stores[(path, sheet_name)] = store
+            return store
+
+        reloaded = store is not None
+        store = _build_store(path, sheet_name, signature, digest)
+        _stores[(path, sheet_name)] = store
+
+    if reloaded:
+        for callback in _reload_listeners:
+            callback(store)
+    return store
+
+
+class VersionCache:
+    # 🔹 قيمة مشتقة من البيانات تُبنى مرة واحدة لكل نسخة (store.version أو store.digest)، والنسخة القديمة تُحذف
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, build):
+        # 🔹 إذا رجع build بـ None لا يُحفظ شيء (مثل المربعات غير المبنية مسبقًا)
+        value = self._entries.get(key)
+        if value is None:
+            with self._lock:
+                value = self._entries.get(key)
+                if value is None:
+                    value = build()
+                    if value is not None:
+                        self._entries.clear()
+                        self._entries[key] = value
+        return value
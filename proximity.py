@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from geo import distances_km
+from instrumentation import add_collector, stage
+from poi_store import add_reload_listener
+from result_cache import ResultCache
+from spatial_index import get_store_index
+
+# 🔹 استعلام واحد لكل التصنيفات المختارة، مع ذاكرة مشتركة حسب (خلية الموقع، النطاق، التصنيف)
+result_cache = ResultCache()
+add_reload_listener(result_cache.invalidate)
+add_collector("result_cache", result_cache.stats)
+
+
+@dataclass(frozen=True)
+class CategoryResult:
+    category: str
+    positions: np.ndarray
+    distances: np.ndarray
+
+    @property
+    def count(self):
+        return len(self.positions)
+
+    def top(self, k=3):
+        # 🔹 النتائج مرتبة أصلاً حسب المسافة
+        return self.positions[:k], self.distances[:k]
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+def _empty_result(category):
+    return CategoryResult(category, _readonly(np.empty(0, dtype="intp")), _readonly(np.empty(0)))
+
+
+def _candidates(store, categories, center, reach_km):
+    # 🔹 مرور واحد على الفهرس المشترك، ثم تقسيم النتائج حسب نطاقات الصفوف لكل تصنيف
+    all_categories = store.categories
+    category_ids = [all_categories.index(category) for category in categories]
+
+    candidates = get_store_index(store).candidates(center, reach_km)
+    candidate_ids = np.searchsorted(store.category_starts, candidates, side="right") - 1
+
+    wanted = np.zeros(len(all_categories), dtype=bool)
+    wanted[category_ids] = True
+    keep = wanted[candidate_ids]
+    candidates, candidate_ids = candidates[keep], candidate_ids[keep]
+
+    distances = distances_km(center, store.lat[candidates], store.lon[candidates])
+    inside = distances <= reach_km
+    candidates, candidate_ids = candidates[inside], candidate_ids[inside]
+
+    # 🔹 المرشحين مرتبين حسب رقم الصف، فكل تصنيف شريحة متصلة
+    grouped = {}
+    for category, category_id in zip(categories, category_ids):
+        lo = np.searchsorted(candidate_ids, category_id, side="left")
+        hi = np.searchsorted(candidate_ids, category_id, side="right")
+        grouped[category] = _readonly(candidates[lo:hi].copy())
+    return grouped
+
+
+def _refine(store, category, candidates, location, radius_km):
+    # 🔹 المسافة الدقيقة من الموقع الفعلي تُحسب فقط للمرشحين المحفوظين للخلية
+    with stage("query.refine", category=category) as span:
+        distances = distances_km(location, store.lat[candidates], store.lon[candidates])
+        inside = distances <= radius_km
+        positions, distances = candidates[inside], distances[inside]
+
+        order = np.argsort(distances, kind="stable")
+        span.rows = len(positions)
+        return CategoryResult(category, _readonly(positions[order]), _readonly(distances[order]))
+
+
+def query_categories(store, categories, location, radius_km):
+    location = (float(location[0]), float(location[1]))
+    radius_km = float(radius_km)
+
+    cell = result_cache.cell_of(location)
+    radius_q = result_cache.quantize_radius(radius_km)
+
+    results = {}
+    missing = []
+    for category in categories:
+        if category not in store.category_ranges:
+            results[category] = _empty_result(category)
+            continue
+
+        candidates = result_cache.get((store.version, cell, radius_q, category))
+        if candidates is None:
+            missing.append(category)
+        else:
+            results[category] = _refine(store, category, candidates, location, radius_km)
+
+    if missing:
+        # 🔹 المرشحين = كل النقاط داخل (النطاق + نصف قطر الخلية) من مركز الخلية
+        center = result_cache.cell_center(cell)
+        reach_km = radius_q + result_cache.cell_half_diagonal_km(cell)
+        with stage("query.candidates") as span:
+            grouped = _candidates(store, missing, center, reach_km)
+            span.rows = sum(len(candidates) for candidates in grouped.values())
+        for category, candidates in grouped.items():
+            result_cache.put((store.version, cell, radius_q, category), candidates, candidates.nbytes)
+            results[category] = _refine(store, category, candidates, location, radius_km)
+
+    return {category: results[category] for category in categories}
+
+
+def result_summary(store, result, top=3):
+    # 🔹 ملخص قابل للتحويل إلى JSON: العدد وأقرب النقاط (تستخدمه الواجهة البرمجية)
+    positions, distances = result.top(top)
+    names = store.frame["Name"].iloc[positions].tolist()
+    return {
+        "count": result.count,
+        "nearest": [
+            {
+                "name": str(name),
+                "lat": float(store.lat[position]),
+                "lon": float(store.lon[position]),
+                "distance_km": round(float(distance), 3),
+            }
+            for name, position, distance in zip(names, positions, distances)
+        ],
+    }
+
+
+def query_nearby(store, categories, location, radius_km, top=3):
+    results = query_categories(store, categories, location, radius_km)
+    return {category: result_summary(store, result, top) for category, result in results.items()}
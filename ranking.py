@@ -0,0 +1,95 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from geo import DISTANCE_COLUMN
+from poi_store import VersionCache
+
+# 🔹 ترتيب نتائج النطاق حسب المسافة أو التقييم (بايزي) أو الاثنين، مع اختيار جزئي لأفضل k فقط
+RANK_MODES = ("distance", "rating", "combined")
+RANK_LABELS = {"distance": "الأقرب", "rating": "الأعلى تقييمًا", "combined": "الأفضل (قرب + تقييم)"}
+RATING_COLUMN = "التقييم"
+
+# 🔹 في الترتيب المشترك: نصف الوزن للقرب (داخل النطاق) ونصفه للتقييم المعدّل
+COMBINED_DISTANCE_WEIGHT = 0.5
+PAGE_SIZE = 20
+
+
+def bayesian_ratings(ratings, votes):
+    # 🔹 (v·R + m·C) / (v + m): التقييم يقترب من متوسط التصنيف C إذا كانت التقييمات قليلة
+    ratings = np.nan_to_num(ratings.astype("float64"))
+    votes = np.nan_to_num(votes.astype("float64"))
+    rated = votes > 0
+    if not rated.any():
+        return np.zeros(len(ratings))
+    prior_mean = (ratings[rated] * votes[rated]).sum() / votes[rated].sum()
+    prior_votes = max(float(np.median(votes[rated])), 1.0)
+    return (votes * ratings + prior_votes * prior_mean) / (votes + prior_votes)
+
+
+def _build_adjusted(store):
+    ratings = store.frame["Rating"].to_numpy(dtype="float64")
+    votes = store.frame["Number_of_Ratings"].to_numpy(dtype="float64")
+    adjusted = np.zeros(len(store.frame))
+    for start, stop in store.category_ranges.values():
+        adjusted[start:stop] = bayesian_ratings(ratings[start:stop], votes[start:stop])
+    adjusted.flags.writeable = False
+    return adjusted
+
+
+_adjusted = VersionCache()
+
+
+def adjusted_ratings(store):
+    # 🔹 محسوبة مرة واحدة لكل نسخة من البيانات، والمتوسط والوزن لكل تصنيف على حدة
+    return _adjusted.get(store.version, partial(_build_adjusted, store))
+
+
+def rank_scores(store, result, rank_by, radius_km):
+    # 🔹 الأعلى أفضل
+    if rank_by == "distance":
+        return -result.distances
+    rating = adjusted_ratings(store)[result.positions]
+    if rank_by == "rating":
+        return rating
+    closeness = 1.0 - result.distances / max(float(radius_km), 1e-9)
+    return COMBINED_DISTANCE_WEIGHT * closeness + (1 - COMBINED_DISTANCE_WEIGHT) * (rating - 1.0) / 4.0
+
+
+def top_order(store, result, k, rank_by="distance", radius_km=None):
+    # 🔹 ترتيب أفضل k فقط: النتائج مرتبة أصلًا حسب المسافة، وغيرها اختيار جزئي (argpartition) ثم ترتيب k
+    k = min(k, result.count)
+    if rank_by == "distance" or k == 0:
+        return np.arange(k)
+
+    scores = rank_scores(store, result, rank_by, radius_km)
+    chosen = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return chosen[np.lexsort((result.distances[chosen], -scores[chosen]))]
+
+
+def top_k(store, result, k=3, rank_by="distance", radius_km=None):
+    order = top_order(store, result, k, rank_by, radius_km)
+    return result.positions[order], result.distances[order]
+
+
+def page_count(result, page_size=PAGE_SIZE):
+    return max(1, -(-result.count // page_size))
+
+
+def ranked_page(store, result, page, rank_by="distance", radius_km=None, page_size=PAGE_SIZE):
+    # 🔹 صفحة وحدة فقط من الجدول (رقم الصفحة يبدأ من 1)، بدون بناء جدول لكل النتائج
+    start = (page - 1) * page_size
+    order = top_order(store, result, start + page_size, rank_by, radius_km)[start:]
+    positions = result.positions[order]
+
+    frame = pd.DataFrame(
+        {
+            "Name": store.frame["Name"].iloc[positions].to_numpy(),
+            DISTANCE_COLUMN: np.round(result.distances[order], 2),
+        },
+        index=pd.RangeIndex(start, start + len(order)),
+    )
+    if rank_by != "distance":
+        frame[RATING_COLUMN] = np.round(adjusted_ratings(store)[positions], 2)
+    return frame
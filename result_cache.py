@@ -0,0 +1,103 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from geo import haversine_km
+
+# 🔹 ذاكرة نتائج مشتركة: الموقع يُقرّب لخلية شبكة، والنطاق يُقرّب لخطوة شريط النطاق
+CELL_DEG = 0.0025  # تقريبًا 250 متر في الرياض
+RADIUS_STEP_KM = 0.5
+MAX_ENTRIES = 4096
+MAX_BYTES = 64 * 1024 * 1024
+TTL_SECONDS = 30 * 60
+
+
+class ResultCache:
+    def __init__(
+        self,
+        cell_deg=CELL_DEG,
+        radius_step_km=RADIUS_STEP_KM,
+        max_entries=MAX_ENTRIES,
+        max_bytes=MAX_BYTES,
+        ttl_seconds=TTL_SECONDS,
+    ):
+        self.cell_deg = cell_deg
+        self.radius_step_km = radius_step_km
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # 🔹 التقريب للشبكة
+    def cell_of(self, location):
+        return (math.floor(location[0] / self.cell_deg), math.floor(location[1] / self.cell_deg))
+
+    def cell_center(self, cell):
+        return ((cell[0] + 0.5) * self.cell_deg, (cell[1] + 0.5) * self.cell_deg)
+
+    def cell_half_diagonal_km(self, cell):
+        center = self.cell_center(cell)
+        corner = (cell[0] * self.cell_deg, cell[1] * self.cell_deg)
+        return float(haversine_km(center[0], center[1], corner[0], corner[1])) * 1.01
+
+    def quantize_radius(self, radius_km):
+        # 🔹 التقريب للأعلى حتى تكون النتائج المحفوظة تشمل النطاق المطلوب
+        return math.ceil(radius_km / self.radius_step_km - 1e-9) * self.radius_step_km
+
+    # 🔹 عمليات الذاكرة
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, stored_at = entry
+            if now - stored_at > self.ttl_seconds:
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
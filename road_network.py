@@ -0,0 +1,289 @@
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from geo import haversine_km
+from poi_store import VersionCache
+from result_cache import ResultCache
+from spatial_index import chord_to_km, to_unit_xyz
+
+# 🔹 شبكة الطرق (محوّلة مسبقًا من OSM) بصيغة CSR مضغوطة، لحساب زمن الوصول بدل المسافة المستقيمة
+ROAD_NETWORK_FILE = "riyadh_roads.npz"
+
+# 🔹 السرعة التقريبية (كم/س) حسب نوع الطريق في OSM إذا ما كانت maxspeed موجودة
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 100, "motorway_link": 60,
+    "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40,
+    "secondary": 50, "secondary_link": 35,
+    "tertiary": 40, "tertiary_link": 30,
+    "unclassified": 30, "residential": 30, "living_street": 15, "service": 20,
+}
+DEFAULT_SPEED_KMH = 30
+
+# 🔹 الوصول من الموقع (أو من المكان) لأقرب تقاطع: بسرعة بطيئة وبحد أقصى للمسافة
+ACCESS_SPEED_KMH = 15
+MAX_SNAP_KM = 1.0
+SOURCE_NODES = 3
+MAX_MINUTES = 30
+BUDGET_STEP_S = 5 * 60
+MIN_EDGE_SECONDS = 0.01
+
+
+@dataclass(frozen=True, eq=False)
+class RoadNetwork:
+    lat: np.ndarray
+    lon: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    seconds: np.ndarray
+    signature: tuple
+
+    @property
+    def node_count(self):
+        return len(self.lat)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+
+def build_csr(lat, lon, sources, targets, seconds, signature=None):
+    # 🔹 ترتيب الحواف حسب نقطة البداية، وإبقاء الأسرع فقط إذا تكررت نفس الحافة
+    order = np.lexsort((seconds, targets, sources))
+    sources, targets, seconds = sources[order], targets[order], seconds[order]
+    first = np.ones(len(sources), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, seconds = sources[first], targets[first], seconds[first]
+
+    indptr = np.zeros(len(lat) + 1, dtype="int64")
+    np.cumsum(np.bincount(sources, minlength=len(lat)), out=indptr[1:])
+    return RoadNetwork(
+        lat=np.asarray(lat, dtype="float64"),
+        lon=np.asarray(lon, dtype="float64"),
+        indptr=indptr,
+        indices=targets.astype("int32"),
+        seconds=np.maximum(seconds, MIN_EDGE_SECONDS).astype("float32"),
+        signature=signature,
+    )
+
+
+def save_network(network, path=ROAD_NETWORK_FILE):
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        lat=network.lat,
+        lon=network.lon,
+        indptr=network.indptr,
+        indices=network.indices,
+        seconds=network.seconds,
+    )
+    os.replace(tmp_path, path)
+
+
+def _speed_kmh(properties):
+    maxspeed = str(properties.get("maxspeed") or "").split()[0:1]
+    if maxspeed and maxspeed[0].isdigit():
+        return float(maxspeed[0])
+    return HIGHWAY_SPEEDS_KMH.get(properties.get("highway"), DEFAULT_SPEED_KMH)
+
+
+def _lines(geometry):
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiLineString":
+        return geometry["coordinates"]
+    return []
+
+
+def convert_geojson(path):
+    # 🔹 تحويل GeoJSON (خطوط الطرق من OSM) إلى شبكة: كل نقطة في الخط تقاطع، وكل جزء حافة
+    with open(path, encoding="utf-8") as fh:
+        features = json.load(fh)["features"]
+
+    node_ids = {}
+    lats, lons = [], []
+    sources, targets, lengths, speeds = [], [], [], []
+
+    def node(lon, lat):
+        key = (round(lat, 7), round(lon, 7))
+        index = node_ids.get(key)
+        if index is None:
+            index = node_ids[key] = len(lats)
+            lats.append(key[0])
+            lons.append(key[1])
+        return index
+
+    for feature in features:
+        properties = feature.get("properties") or {}
+        if not properties.get("highway") or not feature.get("geometry"):
+            continue
+        speed = _speed_kmh(properties)
+        oneway = str(properties.get("oneway", "no")).lower()
+        for line in _lines(feature["geometry"]):
+            ids = [node(point[0], point[1]) for point in line]
+            if oneway == "-1":
+                ids.reverse()
+            for a, b in zip(ids[:-1], ids[1:]):
+                if a == b:
+                    continue
+                sources.append(a)
+                targets.append(b)
+                speeds.append(speed)
+                if oneway not in ("yes", "true", "1", "-1"):
+                    sources.append(b)
+                    targets.append(a)
+                    speeds.append(speed)
+
+    lats, lons = np.array(lats), np.array(lons)
+    sources, targets = np.array(sources, dtype="int64"), np.array(targets, dtype="int64")
+    lengths = haversine_km(lats[sources], lons[sources], lats[targets], lons[targets])
+    seconds = lengths / np.array(speeds) * 3600
+    return build_csr(lats, lons, sources, targets, seconds)
+
+
+_lock = threading.Lock()
+_networks = {}
+_trees = VersionCache()
+_poi_snaps = VersionCache()
+
+# 🔹 نتائج Dijkstra محفوظة لكل تقاطع بداية، فالاستعلامات المتكررة حول نفس المنطقة سريعة
+reach_cache = ResultCache(max_entries=2048, max_bytes=128 * 1024 * 1024)
+
+
+def network_available(path=ROAD_NETWORK_FILE):
+    return os.path.exists(path)
+
+
+def load_network(path=ROAD_NETWORK_FILE):
+    # 🔹 قراءة الملف مرة واحدة لكل عملية، وإعادة القراءة فقط إذا تغيّر
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    network = _networks.get(path)
+    if network is not None and network.signature == signature:
+        return network
+
+    with _lock:
+        with np.load(path) as data:
+            network = RoadNetwork(
+                lat=data["lat"],
+                lon=data["lon"],
+                indptr=data["indptr"],
+                indices=data["indices"],
+                seconds=data["seconds"],
+                signature=signature,
+            )
+        _networks[path] = network
+        reach_cache.invalidate()
+        return network
+
+
+def _build_graph_and_tree(network):
+    graph = csr_matrix(
+        (network.seconds, network.indices, network.indptr),
+        shape=(network.node_count, network.node_count),
+    )
+    return graph, cKDTree(to_unit_xyz(network.lat, network.lon))
+
+
+def _graph_and_tree(network):
+    return _trees.get(network.signature, partial(_build_graph_and_tree, network))
+
+
+def snap(network, lats, lons, k=1):
+    # 🔹 أقرب k تقاطعات لكل نقطة، مع زمن الوصول لها بسرعة الوصول البطيئة
+    _, tree = _graph_and_tree(network)
+    chord, nodes = tree.query(to_unit_xyz(lats, lons), k=k)
+    km = chord_to_km(chord)
+    seconds = np.where(km <= MAX_SNAP_KM, km / ACCESS_SPEED_KMH * 3600, np.inf)
+    return nodes, seconds
+
+
+def _snap_store(network, store):
+    nodes, seconds = snap(network, store.lat, store.lon)
+    return nodes.astype("int32"), seconds.astype("float32")
+
+
+def poi_snaps(network, store):
+    # 🔹 ربط كل الأماكن بأقرب تقاطع مرة واحدة لكل نسخة من البيانات والشبكة
+    return _poi_snaps.get((network.signature, store.version), partial(_snap_store, network, store))
+
+
+def reach_seconds(network, location, budget_s):
+    # 🔹 Dijkstra محدود من عدة تقاطعات قريبة، والنتيجة = أقل زمن لكل تقاطع
+    graph, _ = _graph_and_tree(network)
+    nodes, access = snap(network, [location[0]], [location[1]], k=min(SOURCE_NODES, network.node_count))
+    bucket = math.ceil(budget_s / BUDGET_STEP_S) * BUDGET_STEP_S
+
+    times = np.full(network.node_count, np.inf, dtype="float32")
+    for node, offset in zip(np.atleast_1d(nodes[0]), np.atleast_1d(access[0])):
+        if offset > budget_s:
+            continue
+        key = (network.signature, int(node), bucket)
+        reached = reach_cache.get(key)
+        if reached is None:
+            distances = dijkstra(graph, indices=int(node), limit=bucket)
+            ids = np.flatnonzero(np.isfinite(distances)).astype("int32")
+            reached = (ids, distances[ids].astype("float32"))
+            reach_cache.put(key, reached, reached[0].nbytes + reached[1].nbytes)
+        ids, seconds = reached
+        times[ids] = np.minimum(times[ids], seconds + offset)
+    return times
+
+
+@dataclass(frozen=True)
+class ReachResult:
+    category: str
+    positions: np.ndarray
+    minutes: np.ndarray
+
+    @property
+    def count(self):
+        return len(self.positions)
+
+
+def reachable_categories(network, store, categories, location, minutes):
+    # 🔹 الأماكن التي يمكن الوصول لها خلال N دقيقة، مرتبة حسب زمن الوصول
+    budget_s = float(minutes) * 60
+    times = reach_seconds(network, location, budget_s)
+    nodes, access = poi_snaps(network, store)
+
+    results = {}
+    for category in categories:
+        if category not in store.category_ranges:
+            results[category] = ReachResult(category, np.empty(0, dtype="intp"), np.empty(0))
+            continue
+        start, stop = store.category_ranges[category]
+        seconds = times[nodes[start:stop]] + access[start:stop]
+        inside = np.flatnonzero(seconds <= budget_s)
+        order = np.argsort(seconds[inside], kind="stable")
+        results[category] = ReachResult(category, start + inside[order], seconds[inside][order] / 60)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a GeoJSON road extract into the compact road network file")
+    parser.add_argument("geojson", help="LineString features with OSM highway/oneway/maxspeed properties")
+    parser.add_argument("--out", default=ROAD_NETWORK_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    network = convert_geojson(args.geojson)
+    save_network(network, args.out)
+    print(f"{network.node_count} nodes, {network.edge_count} edges in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from listings import STANDARD_RADII_KM, point_features
+from poi_store import get_store
+from spatial_index import get_category_indexes
+
+# 🔹 حساب عدد الخدمات وأقرب مسافة لآلاف النقاط من ملف CSV/Parquet (بدون الواجهة)
+CHUNK_ROWS = 20000
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    # 🔹 قراءة الملف على دفعات حتى لا يُحمّل كاملًا في الذاكرة
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+class ResultWriter:
+    # 🔹 كتابة النتائج أولًا بأول بنفس ترتيب الإدخال
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._header = True
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, frame):
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+# 🔹 العمليات الفرعية ترث المخزن والفهارس من العملية الأم عند fork (نسخة واحدة في الذاكرة)
+_worker_indexes = None
+
+
+def _init_worker():
+    global _worker_indexes
+    _worker_indexes = get_category_indexes(get_store())
+
+
+def _score_chunk(args):
+    lats, lons, categories, radii_km = args
+    return point_features(_worker_indexes, lats, lons, categories, radii_km)
+
+
+def score_file(source, output, lat_column, lon_column, categories, radii_km, workers=None, chunk_rows=CHUNK_ROWS, progress=None):
+    store = get_store()
+    unknown = [c for c in categories if c not in store.category_ranges]
+    if unknown:
+        raise ValueError(f"unknown categories: {', '.join(unknown)}")
+
+    # 🔹 بناء الفهارس قبل إنشاء العمليات حتى تُشارك عبر fork بدل إعادة بنائها
+    get_category_indexes(store)
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    workers = workers or os.cpu_count() or 1
+
+    writer = ResultWriter(output)
+    pending = deque()
+    rows = 0
+    start = time.perf_counter()
+
+    def flush_one():
+        nonlocal rows
+        chunk, future = pending.popleft()
+        columns = future.result()
+        writer.write(pd.concat([chunk.reset_index(drop=True), pd.DataFrame(columns)], axis=1))
+        rows += len(chunk)
+        if progress:
+            progress(rows, time.perf_counter() - start)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            for chunk in read_chunks(source, chunk_rows):
+                chunk = chunk.dropna(subset=[lat_column, lon_column])
+                if chunk.empty:
+                    continue
+                lats = chunk[lat_column].to_numpy(dtype="float64")
+                lons = chunk[lon_column].to_numpy(dtype="float64")
+                pending.append((chunk, pool.submit(_score_chunk, (lats, lons, categories, radii_km))))
+
+                # 🔹 عدد محدود من الدفعات قيد التنفيذ حتى تبقى الذاكرة ثابتة
+                while len(pending) > 2 * workers:
+                    flush_one()
+            while pending:
+                flush_one()
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score many locations with amenity counts and nearest distances")
+    parser.add_argument("input", help="CSV or Parquet file with one point per row")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--lat-column", default="latitude")
+    parser.add_argument("--lon-column", default="longitude")
+    parser.add_argument("--categories", default="", help="comma separated, default all")
+    parser.add_argument("--radii", default=",".join(f"{r:g}" for r in STANDARD_RADII_KM), help="comma separated km")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    store = get_store()
+    categories = [c for c in args.categories.split(",") if c] or store.categories
+    radii_km = [float(r) for r in args.radii.split(",") if r]
+
+    def report(rows, elapsed):
+        print(f"\r{rows} rows, {rows / max(elapsed, 1e-9):.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    rows, elapsed = score_file(
+        args.input,
+        args.output,
+        args.lat_column,
+        args.lon_column,
+        categories,
+        radii_km,
+        workers=args.workers,
+        chunk_rows=args.chunk_rows,
+        progress=report,
+    )
+    print(f"\n{rows} rows x {len(categories)} categories x {len(radii_km)} radii "
+          f"in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
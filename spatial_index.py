@@ -0,0 +1,132 @@
+import os
+import pickle
+from functools import partial
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from geo import EARTH_RADIUS_KM, distances_km
+from poi_store import CACHE_DIR, VersionCache
+
+# 🔹 الفرق بين الكرة والإهليلج أقل من 0.5%، نوسّع البحث بهذا الهامش ثم نحسب المسافة الدقيقة
+SPHERE_MARGIN = 1.006
+
+# 🔹 الأشجار محفوظة مع بصمة البيانات، فالعملية الجديدة تقرأها بدل بنائها من جديد
+INDEX_FILE = os.path.join(CACHE_DIR, "spatial_index.pkl")
+INDEX_FORMAT = 1
+
+
+def to_unit_xyz(lats, lons):
+    # 🔹 تحويل الإحداثيات لنقاط على كرة نصف قطرها 1 (المسافة الوترية تقابل المسافة على سطح الأرض)
+    lats = np.radians(np.asarray(lats, dtype="float64"))
+    lons = np.radians(np.asarray(lons, dtype="float64"))
+    cos_lat = np.cos(lats)
+    return np.column_stack((cos_lat * np.cos(lons), cos_lat * np.sin(lons), np.sin(lats)))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype="float64") / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def chord_to_km(chord):
+    # 🔹 عكس km_to_chord: مسافة وترية على الكرة الواحدية (من tree.query) إلى كيلومترات على سطح الأرض
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord, 2.0) / 2)
+
+
+class CategoryIndex:
+    def __init__(self, category, positions, lat, lon, tree=None):
+        self.category = category
+        self.positions = positions
+        self.lat = lat
+        self.lon = lon
+        self.tree = tree if tree is not None else cKDTree(to_unit_xyz(lat, lon))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def candidates(self, location, radius_km):
+        # 🔹 مرشحين (بهامش بسيط) مرتبين حسب رقم الصف، المسافة الدقيقة تُحسب بعدها
+        point = to_unit_xyz([location[0]], [location[1]])[0]
+        candidates = self.tree.query_ball_point(point, km_to_chord(radius_km * SPHERE_MARGIN))
+        return np.sort(np.asarray(candidates, dtype="intp"))
+
+    def within(self, location, radius_km):
+        # 🔹 كل النقاط داخل النطاق مرتبة من الأقرب للأبعد
+        candidates = self.candidates(location, radius_km)
+
+        distances = distances_km(location, self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+
+        order = np.argsort(distances, kind="stable")
+        return self.positions[candidates[order]], distances[order]
+
+    def nearest(self, location, k=3):
+        # 🔹 أقرب k نقاط
+        if len(self) == 0 or k <= 0:
+            return self.positions[:0], np.empty(0)
+
+        point = to_unit_xyz([location[0]], [location[1]])[0]
+        extra = min(len(self), k + 4)
+        _, candidates = self.tree.query(point, k=extra)
+        candidates = np.atleast_1d(candidates)
+
+        distances = distances_km(location, self.lat[candidates], self.lon[candidates])
+        order = np.argsort(distances, kind="stable")[:k]
+        return self.positions[candidates[order]], distances[order]
+
+
+
+def load_trees(store, path=INDEX_FILE):
+    # 🔹 يرجع None إذا الملف غير موجود أو لنسخة أخرى من البيانات
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as fh:
+        saved = pickle.load(fh)
+    if saved.get("format") != INDEX_FORMAT or saved.get("digest") != store.digest:
+        return None
+    return saved["trees"]
+
+
+def save_trees(store, indexes, path=INDEX_FILE):
+    shared, by_category = indexes
+    trees = {category: index.tree for category, index in by_category.items()}
+    trees[None] = shared.tree
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        pickle.dump({"format": INDEX_FORMAT, "digest": store.digest, "trees": trees}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _build_indexes(store):
+    trees = load_trees(store) or {}
+    by_category = {}
+    for category, (start, stop) in store.category_ranges.items():
+        positions = np.arange(start, stop)
+        by_category[category] = CategoryIndex(
+            category, positions, store.lat[start:stop], store.lon[start:stop], trees.get(category)
+        )
+    shared = CategoryIndex(None, np.arange(len(store.lat)), store.lat, store.lon, trees.get(None))
+
+    indexes = (shared, by_category)
+    if not trees:
+        save_trees(store, indexes)
+    return indexes
+
+
+_indexes = VersionCache()
+
+
+def _get_indexes(store):
+    # 🔹 فهرس لكل تصنيف + فهرس مشترك لكل النقاط، تُبنى مرة واحدة لكل نسخة من البيانات
+    return _indexes.get(store.version, partial(_build_indexes, store))
+
+
+def get_category_indexes(store):
+    return _get_indexes(store)[1]
+
+
+def get_store_index(store):
+    return _get_indexes(store)[0]
+
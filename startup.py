@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from instrumentation import logger, record, stage
+from poi_store import get_store
+from proximity import query_categories
+from ranking import adjusted_ratings
+from spatial_index import INDEX_FILE, get_store_index
+from transit import get_transit_layer
+
+# 🔹 تشغيل سريع: ملفات جاهزة (الجدول بأنواعه المضغوطة + فهرس المسافات)، وتسخين البيانات قبل استقبال المستخدمين
+WARM_LOCATION = (24.7136, 46.6753)
+WARM_RADIUS_KM = 5.0
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+_IMPORTED = time.time()
+_lock = threading.Lock()
+_report = None
+_first_render = None
+
+
+def process_started():
+    # 🔹 وقت بدء العملية من /proc في لينكس، وإلا وقت تحميل هذا الملف
+    try:
+        with open("/proc/self/stat") as fh:
+            ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED
+
+
+def build_artifacts(density=True, log=print):
+    # 🔹 تُشغّل وقت بناء الصورة (python startup.py build) حتى لا تقرأ أي عملية جديدة ملف الإكسل
+    start = time.perf_counter()
+    store = get_store()
+    log(f"{len(store.frame)} rows from {store.source} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    start = time.perf_counter()
+    get_store_index(store)
+    log(f"spatial index -> {INDEX_FILE} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    if density:
+        from density import DENSITY_DIR, get_density_meta
+
+        start = time.perf_counter()
+        get_density_meta(store)
+        log(f"density tiles -> {DENSITY_DIR} ({time.perf_counter() - start:.1f}s)")
+
+
+def warm_up():
+    # 🔹 مرة واحدة لكل عملية: تحميل البيانات والفهارس وتشغيل استعلام حقيقي، ويرجع تقرير الأزمنة
+    global _report
+    if _report is not None:
+        return _report
+
+    with _lock:
+        if _report is not None:
+            return _report
+
+        steps = {}
+        started = time.perf_counter()
+
+        def step(name, function):
+            step_start = time.perf_counter()
+            with stage(f"startup.{name}"):
+                value = function()
+            steps[name] = round((time.perf_counter() - step_start) * 1000, 1)
+            return value
+
+        store = step("store", get_store)
+        step("index", lambda: get_store_index(store))
+        step("ratings", lambda: adjusted_ratings(store))
+        step("transit", lambda: get_transit_layer(store))
+        step("query", lambda: query_categories(store, store.categories, WARM_LOCATION, WARM_RADIUS_KM))
+
+        _report = {
+            "ready": True,
+            "rows": len(store.frame),
+            "data_digest": store.digest[:16],
+            "warm_ms": round((time.perf_counter() - started) * 1000, 1),
+            "steps_ms": steps,
+            "ready_after_s": round(time.time() - process_started(), 3),
+        }
+        logger.info(json.dumps({"event": "startup.ready", **_report}, ensure_ascii=False))
+    return _report
+
+
+def is_ready():
+    return _report is not None
+
+
+def startup_report():
+    report = dict(_report or {"ready": False})
+    if _first_render is not None:
+        report["first_render_s"] = _first_render
+    return report
+
+
+def mark_first_render():
+    # 🔹 الزمن من بدء العملية حتى اكتمال أول صفحة (مرة واحدة لكل عملية)
+    global _first_render
+    if _first_render is not None:
+        return None
+    with _lock:
+        if _first_render is not None:
+            return None
+        _first_render = round(time.time() - process_started(), 3)
+    record("startup.first_render", _first_render)
+    logger.info(json.dumps({"event": "startup.first_render", "seconds": _first_render}))
+    return _first_render
+
+
+def serve_app(port=None, address=None):
+    # 🔹 التسخين في نفس العملية قبل تشغيل خادم Streamlit، فلا يصل أي مستخدم قبل جاهزية البيانات
+    from streamlit.web import bootstrap
+
+    report = warm_up()
+    print(f"ready in {report['ready_after_s']:.2f}s (warm-up {report['warm_ms']:.0f} ms: {report['steps_ms']})", flush=True)
+
+    flag_options = {}
+    if port is not None:
+        flag_options["server_port"] = port
+    if address is not None:
+        flag_options["server_address"] = address
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(APP_SCRIPT, False, [], flag_options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild serving artifacts, or warm up and start the app")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="write the typed data cache, the spatial index and the density tiles")
+    build.add_argument("--skip-density", action="store_true")
+    serve = commands.add_parser("serve", help="warm up in-process, then start the Streamlit server")
+    serve.add_argument("--port", type=int, default=None)
+    serve.add_argument("--address", default=None)
+    commands.add_parser("check", help="warm up once and print the startup report")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_artifacts(density=not args.skip_density)
+    elif args.command == "serve":
+        serve_app(args.port, args.address)
+    else:
+        json.dump(warm_up(), sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    # 🔹 عبر الوحدة المستوردة (وليس __main__) حتى يشارك app.py نفس حالة التسخين
+    from startup import main as startup_main
+
+    startup_main()
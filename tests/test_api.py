@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+import api
+import startup
+
+
+async def _get(path):
+    server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    if b"application/json" not in head:
+        return int(head.split()[1]), body.decode("utf-8")
+    return int(head.split()[1]), json.loads(body)
+
+
+def _not_loaded(*args, **kwargs):
+    raise AssertionError("data must not be loaded before warm-up finishes")
+
+
+def test_queries_wait_for_warm_up(monkeypatch):
+    # 🔹 قبل التسخين: الاستعلامات 503 بدون تحميل البيانات داخل الطلب، و /health يرد فورًا
+    monkeypatch.setattr(startup, "_report", None)
+    monkeypatch.setattr(api, "get_store", _not_loaded)
+
+    for path in ("/nearby?lat=24.7&lon=46.7", "/profile?lat=24.7&lon=46.7", "/density/malls/12/2578/1756.png", "/ready"):
+        status, payload = asyncio.run(_get(path))
+        assert status == 503, path
+        assert payload == {"error": "warming up"}
+
+    status, payload = asyncio.run(_get("/health"))
+    assert status == 200
+    assert payload["startup"] == {"ready": False}
+
+    # 🔹 /metrics لا يحتاج البيانات فيرد أثناء التسخين، والردود غير الناجحة تظهر فيه باسم المسار الثابت
+    status, metrics = asyncio.run(_get("/metrics"))
+    assert status == 200
+    assert 'stage="api.request",path="/nearby",status="503"' in metrics
+    assert 'stage="api.request",path="/density",status="503"' in metrics
@@ -0,0 +1,30 @@
+import pytest
+
+from transit import parse_routes
+
+# 🔹 أسماء حقيقية من bus_stops.xlsx: أرقام الخطوط ثلاث خانات، وتسلسل المواقف ليس خطًا
+ROUTE_NAMES = [
+    ("Al-Muraba 607", ["607"]),
+    ("Al Batha 101 Bus Stop", ["101"]),
+    ("Bus(342) Stop 104", ["104", "342"]),
+    ("Bus stop 308 - Bus Route 280", ["280", "308"]),
+    ("Omar bin Abdul Aziz 301 bus station R-150", ["150", "301"]),
+    ("Bus station Almalqa 601 Route 936 محطة الملقا ٦٠١", ["601", "936"]),
+    ("Riyadh Bus Station - Khalid Bin Al Waleed 101 خالد بن الوليد 102", ["101", "102"]),
+    ("Al Murabba 606 Bus 9 stop", ["606"]),
+    ("Bus(10) Stop 107", ["107"]),
+    ("King Abdulaziz 08 B", []),
+    ("Dirab 11 A", []),
+    ("Bus Station Imam Shafiee 07 A & 07 B", []),
+    ("Salahuddin Al Ayubi Rapid Bus Station 15", []),
+    ("12-10 Bus station", []),
+    ("موقف الطلاب رقم 13", []),
+    ("Swalahudheen Al ayyoobi Bus station 15A and B", []),
+    ("Al Imam Abi Hanifah Road Shimeysi Batha Royte Bus Stop", []),
+    (None, []),
+]
+
+
+@pytest.mark.parametrize("name, routes", ROUTE_NAMES)
+def test_parse_routes(name, routes):
+    assert parse_routes(name) == routes
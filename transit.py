@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+
+from poi_store import VersionCache
+from spatial_index import get_category_indexes
+
+# 🔹 طبقة الوصول للنقل العام: خطوط الباص المختلفة (ومحطات المترو) التي تصلها مشيًا
+BUS_CATEGORY = "bus"
+METRO_CATEGORY = "metro"
+WALK_DISTANCES_M = (300, 500, 800, 1000, 1500)
+DEFAULT_WALK_M = 800
+
+# 🔹 رقم الخط في اسم المحطة مثل "Al-Malqa 608" أو "Route 936" (والأرقام العربية ٦٠٨ كذلك)
+# 🔹 أرقام الخطوط في البيانات دائمًا ثلاث خانات، والأرقام الأقصر تسلسل موقف مثل "Dirab 11 A" وليست خطوط
+ROUTE_PATTERN = re.compile(r"(?<!\w)([1-9]\d{2})(?!\w)")
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+
+def parse_routes(name):
+    if not isinstance(name, str):
+        return []
+    return sorted(set(ROUTE_PATTERN.findall(name.translate(ARABIC_DIGITS))))
+
+
+def _bitsets(members, universe):
+    # 🔹 مجموعة كل محطة كـ bitset من uint64: الاتحاد = OR، والعدد = popcount
+    bit_of = {value: i for i, value in enumerate(universe)}
+    bitsets = np.zeros((len(members), max(1, -(-len(universe) // 64))), dtype="uint64")
+    for row, values in enumerate(members):
+        for value in values:
+            bit = bit_of[value]
+            bitsets[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+    return bitsets
+
+
+def _members(bitset, universe):
+    bits = np.unpackbits(bitset.view("uint8"), bitorder="little")
+    return [universe[i] for i in np.flatnonzero(bits[:len(universe)])]
+
+
+@dataclass(frozen=True)
+class TransitLayer:
+    routes: list  # رقم كل خط حسب ترتيب البت
+    route_bits: np.ndarray  # (محطات الباص، كلمات uint64)
+    stations: list  # أسماء محطات المترو حسب ترتيب البت
+    station_bits: np.ndarray  # (محطات المترو، كلمات uint64)
+
+
+def build_transit_layer(store):
+    names = store.frame["Name"]
+    bus_routes, stations = [], []
+    if BUS_CATEGORY in store.category_ranges:
+        start, stop = store.category_ranges[BUS_CATEGORY]
+        bus_routes = [parse_routes(name) for name in names.iloc[start:stop]]
+    if METRO_CATEGORY in store.category_ranges:
+        start, stop = store.category_ranges[METRO_CATEGORY]
+        # 🔹 الملف ما فيه خطوط المترو، فكل محطة (بالاسم) عنصر مستقل
+        stations = [[str(name)] for name in names.iloc[start:stop]]
+
+    routes = sorted({route for values in bus_routes for route in values}, key=int)
+    station_names = sorted({value for values in stations for value in values})
+    return TransitLayer(
+        routes=routes,
+        route_bits=_bitsets(bus_routes, routes),
+        stations=station_names,
+        station_bits=_bitsets(stations, station_names),
+    )
+
+
+_layers = VersionCache()
+
+
+def get_transit_layer(store):
+    return _layers.get(store.version, partial(build_transit_layer, store))
+
+
+@dataclass(frozen=True)
+class TransitAccess:
+    walk_m: float
+    stops: int
+    routes: list
+    stations: list
+    nearest_station_km: float
+
+    @property
+    def route_count(self):
+        return len(self.routes)
+
+
+def _union(index, bits, location, walk_km):
+    if index is None or not len(index):
+        return 0, np.zeros(bits.shape[1], dtype="uint64")
+
+    positions, _ = index.within(location, walk_km)
+    if not len(positions):
+        return 0, np.zeros(bits.shape[1], dtype="uint64")
+    local = positions - index.positions[0]
+    return len(local), np.bitwise_or.reduce(bits[local], axis=0)
+
+
+def transit_access(store, location, walk_m=DEFAULT_WALK_M):
+    # 🔹 المرشحين من فهرس المسافات، ثم OR على bitsets المحطات القريبة فقط
+    layer = get_transit_layer(store)
+    indexes = get_category_indexes(store)
+    walk_km = walk_m / 1000
+
+    bus_index, metro_index = indexes.get(BUS_CATEGORY), indexes.get(METRO_CATEGORY)
+    stops, route_union = _union(bus_index, layer.route_bits, location, walk_km)
+    _, station_union = _union(metro_index, layer.station_bits, location, walk_km)
+
+    nearest_km = np.inf
+    if metro_index is not None and len(metro_index):
+        _, distances = metro_index.nearest(location, k=1)
+        nearest_km = float(distances[0]) if len(distances) else np.inf
+
+    return TransitAccess(
+        walk_m=walk_m,
+        stops=stops,
+        routes=_members(route_union, layer.routes),
+        stations=_members(station_union, layer.stations),
+        nearest_station_km=nearest_km,
+    )